@@ -0,0 +1,81 @@
+import os
+import io
+import time
+import resource
+import tracemalloc
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+from scraper_archive import ResponseArchive
+from scraper_parsers import CSV_HEADERS, parse_detail_page, parse_listing_details, available_backends
+
+ARCHIVE_FILE = 'crawl_archive.warc.gz'
+
+def load_listing_pages(archive_path=ARCHIVE_FILE):
+    """Return the HTML of every archived listing detail page"""
+    pages = []
+    for record in ResponseArchive(archive_path).records():
+        if record.status == 200 and '/search/' not in record.url:
+            pages.append(record.body.decode('utf-8', errors='replace'))
+    return pages
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+def benchmark_backend(backend, targeted, pages):
+    """Parse every page with one backend and measure time and memory"""
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    times = []
+    python_peaks = []
+    for html in pages:
+        listing_data = {header: '' for header in CSV_HEADERS}
+        tracemalloc.start()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            soup = parse_detail_page(html, backend, targeted)
+            parse_listing_details(soup, listing_data)
+        times.append(time.perf_counter() - start)
+        python_peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        del soup
+
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_rss
+    if os.uname().sysname == 'Darwin':
+        rss_growth //= 1024
+    return {
+        'backend': backend,
+        'targeted': targeted,
+        'p50_ms': _percentile(times, 50) * 1000,
+        'p95_ms': _percentile(times, 95) * 1000,
+        'mean_ms': sum(times) / len(times) * 1000,
+        'python_peak_kb': max(python_peaks) / 1024,
+        'rss_growth_kb': rss_growth,
+    }
+
+def benchmark_parsers():
+    print("Loading archived listing pages...")
+    pages = load_listing_pages()
+    if not pages:
+        print(f"No listing pages found in {ARCHIVE_FILE}. Run car_scraper.py first to build the archive.")
+        return
+    print(f"Benchmarking {len(pages)} pages with backends: {', '.join(available_backends())}")
+
+    results = []
+    for backend in available_backends():
+        for targeted in (False, True):
+            # A fresh process per run keeps peak RSS readings independent
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                results.append(executor.submit(benchmark_backend, backend, targeted, pages).result())
+
+    print(f"\n{'backend':<12} {'targeted':<9} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8} "
+          f"{'py peak KB':>11} {'RSS +KB':>9}")
+    for r in results:
+        print(f"{r['backend']:<12} {str(r['targeted']):<9} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} "
+              f"{r['mean_ms']:>8.2f} {r['python_peak_kb']:>11.0f} {r['rss_growth_kb']:>9}")
+    print("\npy peak KB is the Python-heap peak per page (tracemalloc); RSS +KB also "
+          "includes C allocations made by lxml and selectolax.")
+
+if __name__ == "__main__":
+    benchmark_parsers()
@@ -0,0 +1,186 @@
+import os
+import csv
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+
+IMAGE_DIR = 'car_images'
+CSV_FILE = 'car_listings.csv'
+STORE_DIR = 'image_store'              # Content-addressed copies: image_store/ab/cd/<sha256>.<ext>
+MANIFEST_FILE = 'image_manifest.json'
+
+LINK_ORIGINALS = True   # Replace each car_images/ file with a hardlink to its store copy
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif')
+STORE_EXTENSIONS = {'JPEG': '.jpg', 'PNG': '.png', 'WEBP': '.webp', 'GIF': '.gif'}
+
+def store_path(digest, extension):
+    """Path of a content hash in the store, sharded by its first two bytes"""
+    return os.path.join(STORE_DIR, digest[:2], digest[2:4], f"{digest}{extension}")
+
+def describe_image(path):
+    """
+    SHA-256, byte size, dimensions and format of one file. The image is
+    decoded completely, so truncated and non-image files come back with
+    valid=False and the decoder's error.
+    """
+    sha = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(chunk)
+            size += len(chunk)
+    width = height = image_format = None
+    error = ''
+    try:
+        with Image.open(path) as image:
+            width, height = image.size
+            image_format = image.format
+            image.load()
+    except Exception as e:
+        error = str(e) or type(e).__name__
+    return {'sha256': sha.hexdigest(), 'bytes': size, 'width': width, 'height': height, 'format': image_format,
+            'valid': not error, 'error': error}
+
+def _describe_file(filename):
+    try:
+        return filename, describe_image(os.path.join(IMAGE_DIR, filename))
+    except OSError as e:
+        print(f"Could not read {filename}: {e}")
+        return filename, None
+
+def listing_ids_by_filename():
+    """ImageFileName -> listing ID from the listings CSV"""
+    ids = {}
+    if os.path.exists(CSV_FILE):
+        with open(CSV_FILE, 'r', newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                if row.get('ImageFileName'):
+                    ids[row['ImageFileName']] = row.get('ID', '')
+    return ids
+
+def load_manifest():
+    if os.path.exists(MANIFEST_FILE):
+        try:
+            with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    return {'files': {}, 'listings': {}, 'invalid': []}
+
+def link_into_store(source, digest, extension):
+    """
+    Put a file into the store (unless its content is already there) and
+    replace the original with a hardlink to the stored copy. Returns the
+    store path and whether the original is now a link.
+    """
+    target = store_path(digest, extension)
+    if not os.path.exists(target):
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            os.link(source, target)
+        except OSError:
+            # Different filesystem: copy instead, via a temp name
+            tmp_path = f"{target}.tmp"
+            with open(source, 'rb') as src, open(tmp_path, 'wb') as dst:
+                for chunk in iter(lambda: src.read(1024 * 1024), b''):
+                    dst.write(chunk)
+            os.replace(tmp_path, target)
+
+    if not LINK_ORIGINALS or os.path.samefile(source, target):
+        return target, os.path.samefile(source, target)
+    # Swap the original for a link atomically, so the old name never goes missing
+    tmp_path = f"{source}.link.tmp"
+    try:
+        os.link(target, tmp_path)
+        os.replace(tmp_path, source)
+        return target, True
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return target, False
+
+def build_image_store():
+    """
+    Scan car_images/ once: hash new or changed files, add them to the store,
+    link the original names to the stored copies and write the manifest.
+    Files whose size, mtime and inode still match the manifest are not re-read.
+    Files that do not decode are kept out of the store and listed as invalid;
+    listings are keyed by the CSV ID of their ImageFileName only.
+    """
+    manifest = load_manifest()
+    known = manifest.get('files', {})
+    csv_ids = listing_ids_by_filename()
+
+    files = {}
+    todo = []
+    stats = {}
+    for entry in os.scandir(IMAGE_DIR):
+        if entry.name.startswith('.') or not entry.is_file() or \
+                not entry.name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        stat = entry.stat()
+        stats[entry.name] = stat
+        cached = known.get(entry.name)
+        if cached and cached['size'] == stat.st_size and cached['mtime'] == stat.st_mtime \
+                and cached.get('inode') == stat.st_ino and 'valid' in cached \
+                and (not cached['valid'] or os.path.exists(cached['path'])):
+            files[entry.name] = cached
+        else:
+            todo.append(entry.name)
+
+    print(f"{len(files)} files unchanged since the last build, {len(todo)} to hash")
+    if todo:
+        with ProcessPoolExecutor() as executor:
+            for filename, info in executor.map(_describe_file, todo, chunksize=32):
+                if info is None:
+                    continue
+                if not info['valid']:
+                    stat = os.stat(os.path.join(IMAGE_DIR, filename))
+                    info.update(path=None, linked=False, size=stat.st_size, mtime=stat.st_mtime, inode=stat.st_ino)
+                    files[filename] = info
+                    continue
+                extension = STORE_EXTENSIONS.get(info['format'], os.path.splitext(filename)[1].lower())
+                path, linked = link_into_store(os.path.join(IMAGE_DIR, filename), info['sha256'], extension)
+                stat = os.stat(os.path.join(IMAGE_DIR, filename))
+                info.update(path=path, linked=linked, size=stat.st_size, mtime=stat.st_mtime, inode=stat.st_ino)
+                files[filename] = info
+
+    listings = {}
+    duplicates = 0
+    seen_hashes = set()
+    invalid = []
+    for filename in sorted(files):
+        info = files[filename]
+        if not info['valid']:
+            invalid.append(filename)
+            continue
+        if info['sha256'] in seen_hashes:
+            duplicates += 1
+        seen_hashes.add(info['sha256'])
+        listing_id = csv_ids.get(filename)
+        if listing_id:
+            listings[listing_id] = {'sha256': info['sha256'], 'bytes': info['bytes'], 'width': info['width'],
+                                    'height': info['height'], 'path': info['path'], 'filename': filename}
+
+    missing = sorted(name for name in csv_ids if name not in files)
+    manifest = {'files': files, 'listings': listings, 'invalid': invalid}
+    tmp_path = f"{MANIFEST_FILE}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, MANIFEST_FILE)
+
+    unlinked = sum(1 for info in files.values() if info['valid'] and not info.get('linked'))
+    print(f"{len(files) - len(invalid)} images, {len(seen_hashes)} unique ({duplicates} byte-identical duplicates), "
+          f"{len(listings)} listings in {MANIFEST_FILE}")
+    if invalid:
+        print(f"{len(invalid)} files are corrupt or not images and were left out of the store, "
+              f"e.g. {', '.join(invalid[:5])} (see verify_images.py)")
+    if unlinked:
+        print(f"{unlinked} originals could not be hardlinked and keep their own copy")
+    if missing:
+        print(f"{len(missing)} ImageFileName values in {CSV_FILE} have no file, e.g. {', '.join(missing[:5])}")
+    return manifest
+
+if __name__ == "__main__":
+    build_image_store()
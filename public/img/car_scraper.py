@@ -1,34 +1,186 @@
 import os
 import re
-import csv
+import sys
 import time
+import socket
+import subprocess
 import random
-import requests
 import traceback
 import string
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options as ChromeOptions
-from selenium.webdriver.firefox.options import Options as FirefoxOptions
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.common.exceptions import TimeoutException
+from scraper_engine import FetchEngine, queue_jobs
+from scraper_transport import Transport
+from scraper_cache import ResponseCache
+from scraper_journal import CrawlJournal, SeenUrlSet
+from scraper_archive import ResponseArchive
+from scraper_parsers import CSV_HEADERS, make_soup, parse_detail_page, parse_listing_details, resolve_backend
+from scraper_images import ImageHashIndex, download_image
+from scraper_cards import ListingStub, extract_search_cards, full_size_image_url
+from scraper_selectors import (SEARCH_SELECTORS, JS_SHELL_MARKERS, NO_RESULTS_MARKERS,
+                               SelectorCache, layout_fingerprint)
+from scraper_waits import PageSettler, WaitStats
+from scraper_trace import Tracer, trace_report
+from scraper_output import RowSink, read_rows
+from scraper_ratelimit import HostRateLimiter, SharedHostRateLimiter
+from scraper_queue import WorkQueue
+from scraper_planner import CrawlBudget, CrawlPlanner, load_known_listings, within_budget
+from scraper_browser import DriverPool
+from scraper_stream import StreamStats, read_detail_prefix
+from scraper_attrs import ATTRIBUTE_TYPES
 
 # Create car_images directory if it doesn't exist
 if not os.path.exists('car_images'):
     os.makedirs('car_images')
 
+# Content hashes of downloaded images, used to skip writing duplicate photos
+IMAGE_HASHES = ImageHashIndex('car_images/.image_hashes.json')
+
 # CSV file to store listing information
 CSV_FILE = 'car_listings.csv'
-CSV_HEADERS = ['ID', 'Title', 'Price', 'URL', 'MapAndAttrs', 'PostingBody', 'ImageCount', 'ImageFileName']
 
-# Create CSV file with headers if it doesn't exist
-if not os.path.exists(CSV_FILE):
-    with open(CSV_FILE, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=CSV_HEADERS)
-        writer.writeheader()
+# Output sink for scraped rows: batched writes through one open file
+OUTPUT_FORMAT = 'csv'          # 'csv', 'jsonl' or 'parquet' (parquet needs pyarrow)
+OUTPUT_FILES = {'csv': CSV_FILE, 'jsonl': 'car_listings.jsonl', 'parquet': 'car_listings.parquet'}
+OUTPUT_FILE = OUTPUT_FILES[OUTPUT_FORMAT]
+OUTPUT_BATCH_SIZE = 25         # Rows buffered before a write
+OUTPUT_FLUSH_SECONDS = 10.0    # ...or seconds since the last write
+OUTPUT_TYPES = {'ID': int, 'ImageCount': int, **ATTRIBUTE_TYPES}   # Typed columns in jsonl/parquet
+
+# Crawl limits
+MAX_PAGES = 15            # Search result pages crawled at most
+TARGET_LISTINGS = 1202    # Stop paginating (and scrolling) once this many listings are found
+MAX_SCROLLS = 100         # Infinite-scroll steps per search page in Selenium
+
+# Budgeted crawl: with either budget set, listings are scheduled by value
+# (new, then price changed on the search card, then stale) and work stops
+# when the budget runs out, e.g. CRAWL_BUDGET_SECONDS = 3600 for a nightly window
+CRAWL_BUDGET_SECONDS = None    # Wall-clock budget for the whole run
+CRAWL_BUDGET_REQUESTS = None   # Network request budget (pages and images)
+STALE_AFTER_HOURS = 72         # Completed listings older than this are refreshed when budget allows
+
+# Concurrent fetch settings
+CONCURRENT_FETCH = True    # Process listings on a thread pool instead of one at a time
+MAX_WORKERS = 8            # Number of listings processed at the same time
+PER_HOST_CONCURRENCY = 4   # Maximum in-flight requests to any single host
+PIPELINE_MODE = True       # Start detail workers while search pages are still being crawled
+PIPELINE_QUEUE_SIZE = 240  # Listing stubs waiting for a worker before pagination pauses
+
+# Work-queue mode (python car_scraper.py enqueue | worker | workers N | export):
+# listings go into a SQLite queue that any number of worker processes, on this
+# box or others sharing the filesystem, claim, process and report back to
+WORK_QUEUE_FILE = 'crawl_queue.sqlite'
+WORK_LEASE_SECONDS = 300    # A claimed listing goes back to the queue if its worker stops heartbeating
+WORK_MAX_ATTEMPTS = 3       # Tries per listing before it is exported as failed
+WORK_POLL_SECONDS = 5.0     # Idle worker wait while other workers still hold leases
+SHARED_RATE_LIMIT = True    # Workers share one per-host rate through the queue file
+
+# Search pages: 'http' fetches the offset pages (&s=0, 120, 240, ...) concurrently
+# through the transport and only opens a browser for pages that need JavaScript;
+# 'selenium' renders and scrolls every page in a browser
+SEARCH_MODE = 'http'
+SEARCH_PAGE_SIZE = 120     # Results per search page (the &s= offset step)
+SEARCH_CONCURRENCY = 4     # Search pages fetched at the same time in 'http' mode
+
+# Connection pool settings for the shared HTTP transport
+POOL_CONNECTIONS = 10                  # Number of hosts that keep a connection pool
+POOL_MAXSIZE = PER_HOST_CONCURRENCY    # Keep-alive connections kept per host
+POOL_BLOCK = True                      # Wait for a free connection instead of opening extras
+
+# On-disk HTTP cache for listing and search pages
+USE_HTTP_CACHE = True        # Revalidate cached pages with ETag/Last-Modified
+HTTP_CACHE_DIR = 'http_cache'
+CACHE_ONLY = False           # Offline mode: serve pages from the cache only, never the network
+
+# Resumable crawl state
+RESUME_CRAWL = True                    # Keep the CSV and skip listings already completed
+JOURNAL_FILE = 'crawl_journal.jsonl'   # Append-only log of each listing URL's outcome
+SEEN_URLS_PREFIX = 'seen_urls'         # Bloom filter + exact key file of completed URLs
+
+JOURNAL = CrawlJournal(JOURNAL_FILE)
+SEEN_URLS = SeenUrlSet(SEEN_URLS_PREFIX)
+
+# Raw response archive (replaces the loose debug_*.html dumps)
+ARCHIVE_FILE = 'crawl_archive.warc.gz'
+REPLAY_ARCHIVE = False       # Run the whole crawl from the archive with zero network
+REPLAY_PARSE_ONLY = False    # Only re-run detail-page parsing over the archive and report timing
+
+ARCHIVE = ResponseArchive(ARCHIVE_FILE)
+
+# HTML parsing
+PARSER_BACKEND = resolve_backend('lxml')   # 'html.parser', 'lxml' or 'selectolax'
+TARGETED_PARSING = True                    # Only build the detail-page nodes we actually read
+
+# Detail pages: 'always' fetches every listing page, 'new' only listings not
+# completed in an earlier run, 'never' writes rows from the search card alone
+# (title, price, URL and thumbnail, no MapAndAttrs/PostingBody)
+DETAIL_FETCH_MODE = 'always'
+
+# Stream detail pages and stop the download once every field the scraper
+# reads has arrived. Off by default: streamed pages bypass the HTTP cache
+# (no revalidation) and are not archived, so REPLAY_ARCHIVE, REPLAY_PARSE_ONLY
+# and benchmark_parsers.py have no detail pages to work with afterwards.
+# Not used with CACHE_ONLY or REPLAY_ARCHIVE.
+STREAM_DETAIL_PAGES = False
+STREAM_CHUNK_SIZE = 8192
+
+STREAM_STATS = StreamStats()
+
+# Remembers which selector matched for each page layout, across runs
+SELECTOR_CACHE = SelectorCache('selector_cache.json')
+
+# Selenium waits: return once the page stops changing instead of fixed sleeps
+EVENT_DRIVEN_WAITS = True    # False restores the fixed 10s/5s/2s sleeps
+WAIT_IDLE_SECONDS = 1.0      # How long counts, height and DOM must stay unchanged
+WAIT_POLL_SECONDS = 0.2      # Time between page probes
+
+WAIT_STATS = WaitStats()
+
+# Politeness: one token bucket per host, shared by every worker (no random sleeps)
+RATE_LIMIT_PER_SECOND = 0.5      # Steady requests per second to any one host
+RATE_LIMIT_BURST = 2             # Requests allowed back to back after an idle spell
+RATE_LIMIT_HOSTS = {'images.craigslist.org': 2.0}   # Per-host rate overrides
+MAX_RETRIES = 3                  # Retries after 429/503, waiting Retry-After or backing off exponentially
+
+RATE_LIMITER = HostRateLimiter(rate=RATE_LIMIT_PER_SECOND, burst=RATE_LIMIT_BURST,
+                               host_rates=RATE_LIMIT_HOSTS)
+
+# Per-stage timing spans (delay, connect, TTFB, body, parse, selector, image, CSV)
+TRACE_SPANS = True
+TRACE_FILE = 'crawl_trace.jsonl'   # Report: python scraper_trace.py crawl_trace.jsonl
+
+TRACER = Tracer(TRACE_FILE, enabled=TRACE_SPANS)
+
+# Browsers for pages that need JavaScript: started once and reused across pages
+BROWSER_POOL_SIZE = 1          # Browsers kept running (search pages render one at a time)
+BROWSER_BLOCK_RESOURCES = True # Skip images, fonts and stylesheets; listings only need the DOM
+BROWSER_EAGER_LOAD = True      # driver.get() returns at DOMContentLoaded
+BROWSER_RECYCLE_AFTER = 50     # Restart a browser after this many pages
+SELENIUM_DEBUG = False         # Save before/after screenshots of every page
+
+DRIVER_POOL = DriverPool(size=BROWSER_POOL_SIZE, block_resources=BROWSER_BLOCK_RESOURCES,
+                         eager=BROWSER_EAGER_LOAD, recycle_after=BROWSER_RECYCLE_AFTER, tracer=TRACER)
+
+# One transport for the whole crawl, shared by listing-page and image requests
+TRANSPORT = Transport(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE,
+                      pool_block=POOL_BLOCK, per_host=PER_HOST_CONCURRENCY,
+                      cache=ResponseCache(HTTP_CACHE_DIR) if USE_HTTP_CACHE else None,
+                      cache_only=CACHE_ONLY, archive=ARCHIVE, replay=REPLAY_ARCHIVE,
+                      tracer=TRACER, rate_limiter=RATE_LIMITER, max_retries=MAX_RETRIES)
+
+# Rows are marked complete (journal + seen set) only once their batch is on disk
+OUTPUT = RowSink(OUTPUT_FILE, CSV_HEADERS, format=OUTPUT_FORMAT, batch_size=OUTPUT_BATCH_SIZE,
+                 flush_seconds=OUTPUT_FLUSH_SECONDS, types=OUTPUT_TYPES,
+                 on_flush=lambda rows: mark_rows_written(rows), tracer=TRACER)
+
+# Search results to crawl
+SEARCH_URL = "https://washingtondc.craigslist.org/search/cta?condition=10&condition=20&condition=30&condition=40&hasPic=1&isTrusted=true&max_auto_miles=150000&min_auto_year=1997&min_price=4500"
 
 def get_headers():
     """Generate random headers to avoid detection"""
@@ -50,23 +202,17 @@ def get_headers():
     return headers
 
 def get_tor_session():
-    """Function to create a new requests session"""
-    # For simplicity, we'll just use a regular session
+    """Function to return the shared HTTP transport"""
+    # For simplicity, we'll just use a regular pooled session
     # In a full Tor implementation, you'd connect to the Tor SOCKS proxy
-    return requests.Session()
+    return TRANSPORT
 
 def renew_tor_ip():
     """Function to get a new Tor IP address"""
     # In a real implementation, this would connect to Tor control port
     # and send a NEWNYM signal
+    # Pacing is left to RATE_LIMITER, so there is no fixed stall here
     print("Renewing IP address...")
-    time.sleep(2)  # Simulate the delay of getting a new IP
-    
-def random_delay(min_seconds=1, max_seconds=5):
-    """Add a random delay to avoid rate limiting"""
-    delay = random.uniform(min_seconds, max_seconds)
-    print(f"Waiting for {delay:.2f} seconds...")
-    time.sleep(delay)
 
 def number_to_alpha(n):
     """Convert a number to alphabetical equivalent (A=1, B=2, ..., Z=26, AA=27, etc.)"""
@@ -101,207 +247,157 @@ def get_first_n_chars_no_spaces(text, n=25):
         
     return result
 
-def download_images_from_listing(listing, session_count=0, listing_counter=1):
+def get_image_path(listing_counter, title):
+    """Build the car_images/ path for a listing's image: alpha ID + title part + listing ID"""
+    # Create a new filename using the alphabetical equivalent of the listing counter
+    alpha_id = number_to_alpha(listing_counter)
+    
+    # Get the first 25 characters from the title (excluding spaces)
+    title_part = get_first_n_chars_no_spaces(title, 25)
+    
+    # Create the new filename: alpha_id + title_part + listing_id + extension
+    new_filename = f"{alpha_id}{title_part}{listing_counter}.jpg"
+    
+    # Remove any remaining spaces from the filename
+    new_filename = remove_spaces(new_filename)
+    
+    # Full path to save the image
+    return f"car_images/{new_filename}"
+
+def should_fetch_detail(url):
+    """Decide from DETAIL_FETCH_MODE whether a listing needs its detail page"""
+    if DETAIL_FETCH_MODE == 'never':
+        return False
+    if DETAIL_FETCH_MODE == 'new':
+        return url not in SEEN_URLS
+    return True
+
+def save_listing_image(session, img_url, listing_counter, title, listing_data, session_count, journal_url=None):
+    """Download a listing's image into car_images/ and record it in listing_data"""
+    try:
+        # Get fresh headers (the transport's rate limiter paces the request)
+        img_headers = get_headers()
+        
+        # Stream the image to a temp file and rename it into place
+        filename = get_image_path(listing_counter, title)
+        with TRACER.span('image_write') as span:
+            img_result = download_image(session, img_url, img_headers, filename, IMAGE_HASHES)
+            span['bytes'] = img_result['bytes']
+        if img_result['status'] == 200:
+            if img_result['duplicate_of']:
+                print(f"Downloaded: {filename} (same image as {img_result['duplicate_of']}, linked instead of written)")
+            else:
+                print(f"Downloaded: {filename}")
+            
+            # Save image details in listing data
+            listing_data['ImageCount'] = 1
+            listing_data['ImageFileName'] = os.path.basename(filename)
+            if journal_url:
+                JOURNAL.record(journal_url, 'image_saved', id=listing_data['ID'], file=listing_data['ImageFileName'])
+            
+            # Rotate IP after download
+            session_count += 1
+            if session_count % 5 == 0:  # Change IP after every 5 downloads
+                renew_tor_ip()
+        else:
+            print(f"Failed to download image: {img_url}, status: {img_result['status']}")
+            if journal_url:
+                JOURNAL.record(journal_url, 'failed', stage='image', status_code=img_result['status'])
+    except Exception as e:
+        print(f"Error downloading image: {e}")
+        if journal_url:
+            JOURNAL.record(journal_url, 'failed', stage='image', error=str(e))
+        # Try to renew IP if we encounter an error
+        renew_tor_ip()
+    return session_count
+
+def download_images_from_listing(card, session_count=0, listing_counter=1, row_sink=None):
+    """Process one search card: fetch its detail page (see DETAIL_FETCH_MODE) and image, then write its row"""
+    # Every span recorded while this listing is processed is tagged with its ID
+    with TRACER.listing(str(listing_counter)), TRACER.span('listing'):
+        return process_listing_card(card, session_count, listing_counter, row_sink)
+
+def process_listing_card(card, session_count=0, listing_counter=1, row_sink=None):
+    # Rows go to the CSV unless the caller collects them itself
+    row_sink = row_sink or write_listing_row
     try:
-        # Create dictionary to hold all listing data for CSV
+        # Extract listing ID from counter (no longer using the original ID)
+        listing_id = str(listing_counter)
+        
+        # Create dictionary to hold all listing data for CSV, starting from the search card
         listing_data = {
-            'ID': str(listing_counter),
-            'Title': '',
-            'Price': '',
-            'URL': '',
+            'ID': listing_id,
+            'Title': card.title,
+            'Price': card.price,
+            'URL': card.url,
             'MapAndAttrs': '',
             'PostingBody': '',
             'ImageCount': 0,
             'ImageFileName': ''
         }
         
-        # Extract listing ID from counter (no longer using the original ID)
-        listing_id = str(listing_counter)
-        
-        # Try to extract price information from the listing
-        price_span = listing.select_one('span.priceinfo')
-        if price_span:
-            listing_data['Price'] = price_span.text.strip()
-        
-        # Extract listing URL
-        listing_link = listing.select_one('a.posting-title')
-        if not listing_link:
-            # Try an alternative selector for the link
-            listing_link = listing.select_one('a')
-            
-        if not listing_link:
+        full_url = card.url
+        if not full_url:
             print("No link found in listing")
             return session_count
         
-        # Extract href and make sure it's a full URL
-        href = listing_link.get('href')
-        if not href:
-            print("No href attribute in listing link")
-            return session_count
-            
-        full_url = href if href.startswith('http') else urljoin("https://washingtondc.craigslist.org", href)
-        print(f"Accessing URL: {full_url}")
-        listing_data['URL'] = full_url
-        
-        # Extract title from the span.label inside the link
-        title_span = listing_link.select_one('span.label')
-        if title_span:
-            title = title_span.text.strip()
-            listing_data['Title'] = title
-        else:
-            # Try other methods to get title
-            title_elem = listing.select_one('div.title')
-            if not title_elem:
-                # Try alt text from image if title not found
-                img = listing.select_one('img')
-                title = img.get('alt', '') if img else f"car_{listing_id}"
-            else:
-                title = title_elem.text.strip()
-            
-            listing_data['Title'] = title
-            
         # Clean the title for use as a filename
-        title = re.sub(r'[\\/*?:"<>|]', "", title)[:50]
+        title = re.sub(r'[\\/*?:"<>|]', "", card.title or f"car_{listing_id}")[:50]
         
         print(f"Processing listing: {title}")
         
-        # Get fresh headers
-        headers = get_headers()
-        
         # Get Tor session
         session = get_tor_session()
         
-        # Random delay before accessing the listing page
-        random_delay()
+        if not should_fetch_detail(full_url):
+            # Fast path: everything comes from the search card, only the image is fetched
+            img_url = full_size_image_url(card.thumbnail)
+            if img_url and not img_url.endswith(('.gif', 'blank.gif')):
+                session_count = save_listing_image(session, img_url, listing_counter, title,
+                                                   listing_data, session_count, journal_url=full_url)
+            row_sink(listing_data)
+            return session_count
+        
+        print(f"Accessing URL: {full_url}")
+        
+        # Get fresh headers
+        headers = get_headers()
         
         # Visit the individual listing page
         try:
-            response = session.get(full_url, headers=headers, timeout=30)
+            if STREAM_DETAIL_PAGES and not (REPLAY_ARCHIVE or CACHE_ONLY):
+                response, detail_html = fetch_detail_streamed(session, full_url, headers)
+            else:
+                response = session.get(full_url, headers=headers, timeout=30, use_cache=True, archive=True)
+                detail_html = None
             print(f"Status code: {response.status_code}")
             if response.status_code != 200:
                 print(f"Failed to access listing page: {full_url}")
+                JOURNAL.record(full_url, 'failed', stage='listing_page', status_code=response.status_code)
                 # Still write what we have to CSV
-                write_to_csv(listing_data)
+                row_sink(listing_data)
                 return session_count
         except Exception as e:
             print(f"Error accessing listing page: {e}")
+            JOURNAL.record(full_url, 'failed', stage='listing_page', error=str(e))
             # Still write what we have to CSV
-            write_to_csv(listing_data)
+            row_sink(listing_data)
             return session_count
             
-        detail_soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Debug: Save HTML to analyze
-        with open(f"debug_listing_{listing_id}.html", "w", encoding="utf-8") as f:
-            f.write(response.text)
-        
-        # Extract mapAndAttrs data
-        map_attrs = detail_soup.select_one('.mapAndAttrs')
-        if map_attrs:
-            # Get all text from mapAndAttrs and clean it up
-            map_attrs_text = map_attrs.get_text(separator=' ', strip=True)
-            # Remove excessive whitespace
-            map_attrs_text = re.sub(r'\s+', ' ', map_attrs_text)
-            listing_data['MapAndAttrs'] = map_attrs_text
-            print(f"MapAndAttrs found: {map_attrs_text[:100]}...")
-        
-        # Extract posting body
-        posting_body = detail_soup.select_one('#postingbody')
-        if posting_body:
-            # Remove any "QR Code Link to This Post" text which is common in Craigslist
-            qr_link = posting_body.select_one('.print-qrcode-container')
-            if qr_link:
-                qr_link.decompose()
-                
-            body_text = posting_body.get_text(separator=' ', strip=True)
-            # Remove excessive whitespace
-            body_text = re.sub(r'\s+', ' ', body_text)
-            listing_data['PostingBody'] = body_text
-            print(f"Posting body found: {body_text[:100]}...")
-        
-        # Find image URLs on the detail page - try multiple selectors
-        selectors_to_try = [
-            'picture img',
-            'div.swipe-wrap img',
-            '.gallery img',
-            'img[data-src]',
-            'img'  # Last resort
-        ]
-        
-        image_elements = []
-        for selector in selectors_to_try:
-            image_elements = detail_soup.select(selector)
-            if image_elements:
-                print(f"Found {len(image_elements)} images with selector: {selector}")
-                break
-        
-        # Only process the first image
-        if image_elements:
-            img = image_elements[0]  # Take only the first image
-            img_url = None
-            
-            # Try several attributes where the image URL might be found
-            for attr in ['src', 'data-src', 'data-url', 'data-hq-url']:
-                if attr in img.attrs:
-                    img_url = img[attr]
-                    if img_url and not img_url.endswith('blank.gif'):
-                        break
-            
-            # Handle full-resolution images if available
-            if img_url and '600x450' in img_url:
-                # Try to get a higher resolution version
-                img_url = img_url.replace('600x450', '1200x900')
-                
-            print(f"Image URL found: {img_url}")
-            
-            if img_url and not img_url.endswith(('.gif', 'blank.gif')):
-                try:
-                    # Random delay before downloading the image
-                    random_delay()
-                    
-                    # Get fresh headers
-                    img_headers = get_headers()
-                    
-                    img_response = session.get(img_url, headers=img_headers, timeout=30)
-                    if img_response.status_code == 200:
-                        # Create a new filename using the alphabetical equivalent of the listing counter
-                        alpha_id = number_to_alpha(listing_counter)
-                        
-                        # Get the first 25 characters from the title (excluding spaces)
-                        title_part = get_first_n_chars_no_spaces(title, 25)
-                        
-                        # Create the new filename: alpha_id + title_part + listing_id + extension
-                        new_filename = f"{alpha_id}{title_part}{listing_id}.jpg"
-                        
-                        # Remove any remaining spaces from the filename
-                        new_filename = remove_spaces(new_filename)
-                        
-                        # Full path to save the image
-                        filename = f"car_images/{new_filename}"
-                        
-                        with open(filename, 'wb') as f:
-                            f.write(img_response.content)
-                        print(f"Downloaded: {filename}")
-                        
-                        # Save image details in listing data
-                        listing_data['ImageCount'] = 1
-                        listing_data['ImageFileName'] = os.path.basename(filename)
-                        
-                        # Rotate IP after download
-                        session_count += 1
-                        if session_count % 5 == 0:  # Change IP after every 5 downloads
-                            renew_tor_ip()
-                    else:
-                        print(f"Failed to download image: {img_url}, status: {img_response.status_code}")
-                except Exception as e:
-                    print(f"Error downloading image: {e}")
-                    # Try to renew IP if we encounter an error
-                    renew_tor_ip()
-        else:
-            print(f"No images found for listing: {title}")
-            
+        JOURNAL.record(full_url, 'fetched', id=listing_id)
+        with TRACER.span('parse', kind='detail'):
+            detail_soup = parse_detail_page(detail_html if detail_html is not None else response.text,
+                                            PARSER_BACKEND, TARGETED_PARSING)
+        
+        # Extract the listing fields and the first image URL
+        img_url = parse_listing_details(detail_soup, listing_data, SELECTOR_CACHE, TRACER)
+        JOURNAL.record(full_url, 'parsed', id=listing_id)
+        
+        if img_url and not img_url.endswith(('.gif', 'blank.gif')):
+            session_count = save_listing_image(session, img_url, listing_counter, title,
+                                               listing_data, session_count, journal_url=full_url)
         # Write the collected data to CSV
-        write_to_csv(listing_data)
+        row_sink(listing_data)
                          
         return session_count
     
@@ -310,6 +406,75 @@ def download_images_from_listing(listing, session_count=0, listing_counter=1):
         traceback.print_exc()
         return session_count
 
+def fetch_detail_streamed(session, url, headers):
+    """
+    GET a detail page as a stream and stop reading once the title, attributes,
+    posting body and first gallery image have arrived. Returns the response and
+    the HTML read so far (None if the status was not 200). The partial HTML
+    is never cached or archived.
+    """
+    response = session.get(url, headers=headers, timeout=30, stream=True)
+    if response.status_code != 200:
+        response.close()
+        return response, None
+    with TRACER.span('body', host='stream') as fields:
+        html, stopped_early, bytes_read, bytes_saved = read_detail_prefix(response, STREAM_CHUNK_SIZE,
+                                                                          STREAM_STATS)
+        fields.update(bytes=bytes_read, saved=bytes_saved)
+    if stopped_early:
+        print(f"Stopped detail download early: read {bytes_read} bytes, skipped {bytes_saved} bytes")
+    return response, html
+
+def write_listing_row(listing_data):
+    """Queue a listing's row; it is marked complete once its batch is written"""
+    write_to_csv(listing_data)
+
+def mark_rows_written(rows):
+    """Called by the output sink after a batch is on disk: mark each listing complete unless it failed"""
+    for row in rows:
+        url = row['URL']
+        if url:
+            JOURNAL.record(url, 'written', id=row['ID'])
+            # Failed listings stay out of the seen set so the next run retries them
+            if not JOURNAL.failed(url):
+                SEEN_URLS.add(url)
+
+def written_listing_ids():
+    """URL -> ID of every listing whose row an earlier run wrote (from the journal)"""
+    ids = {}
+    for entry in JOURNAL.entries():
+        if entry.get('status') == 'written' and str(entry.get('id', '')).isdigit():
+            ids[entry['url']] = int(entry['id'])
+    return ids
+
+def number_listings(cards, first_id, listing_ids):
+    """
+    Yield cards, appending each one's ID to listing_ids first. A listing an
+    earlier run already wrote a row for (it failed and is being retried)
+    keeps that ID, so its new row replaces the old one when the output is
+    compacted; the others are numbered from first_id.
+    """
+    known = written_listing_ids()
+    next_id = first_id
+    for card in cards:
+        if card is FetchEngine.IDLE:
+            yield card
+            continue
+        if card.url in known:
+            listing_ids.append(known[card.url])
+        else:
+            listing_ids.append(next_id)
+            next_id += 1
+        yield card
+
+def get_next_listing_id():
+    """Return the ID after the highest one already in the output"""
+    last_id = 0
+    for row in read_rows(OUTPUT_FILE, OUTPUT_FORMAT):
+        if str(row.get('ID', '')).isdigit():
+            last_id = max(last_id, int(row['ID']))
+    return last_id + 1
+
 def write_to_csv(listing_data):
     """Write listing data to CSV file"""
     try:
@@ -322,10 +487,9 @@ def write_to_csv(listing_data):
                 listing_data['Title'] = map_attrs_text[:colon_pos].strip()
                 print(f"Moved MapAndAttrs section to Title: {listing_data['Title']}")
                 
-        with open(CSV_FILE, 'a', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=CSV_HEADERS)
-            writer.writerow(listing_data)
-            print(f"Wrote listing {listing_data['ID']} to CSV")
+        # Buffered: the sink writes rows in batches through one open file
+        OUTPUT.write(listing_data)
+        print(f"Wrote listing {listing_data['ID']} to {OUTPUT_FILE}")
     except Exception as e:
         print(f"Error writing to CSV: {e}")
         traceback.print_exc()
@@ -355,12 +519,9 @@ def process_direct_listing(url, session_count=0, listing_counter=1):
         # Get Tor session
         session = get_tor_session()
         
-        # Random delay before accessing the listing page
-        random_delay()
-        
         # Visit the listing page
         try:
-            response = session.get(url, headers=headers, timeout=30)
+            response = session.get(url, headers=headers, timeout=30, use_cache=True, archive=True)
             print(f"Status code: {response.status_code}")
             if response.status_code != 200:
                 print(f"Failed to access listing page: {url}")
@@ -371,11 +532,7 @@ def process_direct_listing(url, session_count=0, listing_counter=1):
             write_to_csv(listing_data)
             return session_count
             
-        detail_soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Debug: Save HTML to analyze
-        with open(f"debug_listing_{listing_data['ID']}.html", "w", encoding="utf-8") as f:
-            f.write(response.text)
+        detail_soup = parse_detail_page(response.text, PARSER_BACKEND, TARGETED_PARSING)
             
         # Extract title from the page
         title_elem = detail_soup.select_one('h1.posting-title span.postingtitletext')
@@ -410,111 +567,12 @@ def process_direct_listing(url, session_count=0, listing_counter=1):
         
         print(f"Processing listing: {title}")
         
-        # Extract mapAndAttrs data
-        map_attrs = detail_soup.select_one('.mapAndAttrs')
-        if map_attrs:
-            # Get all text from mapAndAttrs and clean it up
-            map_attrs_text = map_attrs.get_text(separator=' ', strip=True)
-            # Remove excessive whitespace
-            map_attrs_text = re.sub(r'\s+', ' ', map_attrs_text)
-            listing_data['MapAndAttrs'] = map_attrs_text
-            print(f"MapAndAttrs found: {map_attrs_text[:100]}...")
-        
-        # Extract posting body
-        posting_body = detail_soup.select_one('#postingbody')
-        if posting_body:
-            # Remove any "QR Code Link to This Post" text which is common in Craigslist
-            qr_link = posting_body.select_one('.print-qrcode-container')
-            if qr_link:
-                qr_link.decompose()
-                
-            body_text = posting_body.get_text(separator=' ', strip=True)
-            # Remove excessive whitespace
-            body_text = re.sub(r'\s+', ' ', body_text)
-            listing_data['PostingBody'] = body_text
-            print(f"Posting body found: {body_text[:100]}...")
-            
-        # Find image URLs on the detail page - try multiple selectors
-        selectors_to_try = [
-            'picture img',
-            'div.swipe-wrap img',
-            '.gallery img',
-            'img[data-src]',
-            'img'  # Last resort
-        ]
-        
-        image_elements = []
-        for selector in selectors_to_try:
-            image_elements = detail_soup.select(selector)
-            if image_elements:
-                print(f"Found {len(image_elements)} images with selector: {selector}")
-                break
-        
-        # Only process the first image
-        if image_elements:
-            img = image_elements[0]  # Take only the first image
-            img_url = None
-            
-            # Try several attributes where the image URL might be found
-            for attr in ['src', 'data-src', 'data-url', 'data-hq-url']:
-                if attr in img.attrs:
-                    img_url = img[attr]
-                    if img_url and not img_url.endswith('blank.gif'):
-                        break
-            
-            # Handle full-resolution images if available
-            if img_url and '600x450' in img_url:
-                # Try to get a higher resolution version
-                img_url = img_url.replace('600x450', '1200x900')
-                
-            print(f"Image URL found: {img_url}")
-            
-            if img_url and not img_url.endswith(('.gif', 'blank.gif')):
-                try:
-                    # Random delay before downloading the image
-                    random_delay()
-                    
-                    # Get fresh headers
-                    img_headers = get_headers()
-                    
-                    img_response = session.get(img_url, headers=img_headers, timeout=30)
-                    if img_response.status_code == 200:
-                        # Create a new filename using the alphabetical equivalent of the listing counter
-                        alpha_id = number_to_alpha(listing_counter)
-                        
-                        # Get the first 25 characters from the title (excluding spaces)
-                        title_part = get_first_n_chars_no_spaces(title, 25)
-                        
-                        # Create the new filename: alpha_id + title_part + listing_id + extension
-                        new_filename = f"{alpha_id}{title_part}{listing_id}.jpg"
-                        
-                        # Remove any remaining spaces from the filename
-                        new_filename = remove_spaces(new_filename)
-                        
-                        # Full path to save the image
-                        filename = f"car_images/{new_filename}"
-                        
-                        with open(filename, 'wb') as f:
-                            f.write(img_response.content)
-                        print(f"Downloaded: {filename}")
-                        
-                        # Save image details in listing data
-                        listing_data['ImageCount'] = 1
-                        listing_data['ImageFileName'] = os.path.basename(filename)
-                        
-                        # Rotate IP after download
-                        session_count += 1
-                        if session_count % 5 == 0:  # Change IP after every 5 downloads
-                            renew_tor_ip()
-                    else:
-                        print(f"Failed to download image: {img_url}, status: {img_response.status_code}")
-                except Exception as e:
-                    print(f"Error downloading image: {e}")
-                    # Try to renew IP if we encounter an error
-                    renew_tor_ip()
-        else:
-            print(f"No images found for listing: {title}")
-            
+        # Extract the listing fields and the first image URL
+        img_url = parse_listing_details(detail_soup, listing_data, SELECTOR_CACHE, TRACER)
+        
+        if img_url and not img_url.endswith(('.gif', 'blank.gif')):
+            session_count = save_listing_image(session, img_url, listing_counter, title,
+                                               listing_data, session_count)
         # Write the collected data to CSV
         write_to_csv(listing_data)
         
@@ -525,257 +583,716 @@ def process_direct_listing(url, session_count=0, listing_counter=1):
         traceback.print_exc()
         return session_count
 
-def scroll_to_bottom(url, max_scrolls=100):
+def scrape_listings_concurrently(all_listings, first_id=1, listing_ids=None, should_stop=None):
+    """
+    Process listings on a thread pool. IDs follow the order of all_listings,
+    starting at first_id (or are taken from listing_ids, one per listing; a
+    generator such as number_listings() may fill it as the jobs are produced), and
+    CSV rows are written in job order, exactly as the serial loop does.
+    all_listings can also be a job source from queue_jobs(), whose length is
+    not known up front. Listings not yet started when should_stop() turns
+    True are skipped.
+    """
+    total_listings = len(all_listings) if hasattr(all_listings, '__len__') else None
+    engine = FetchEngine(max_workers=MAX_WORKERS)
+    state = {'session_count': 0, 'processed': 0, 'skipped': 0}
+    state_lock = threading.Lock()
+
+    def fetch_listing(seq, listing):
+        if should_stop is not None and should_stop():
+            with state_lock:
+                state['skipped'] += 1
+            return None
+        listing_counter = listing_ids[seq - 1] if listing_ids is not None else first_id + seq - 1
+        rows = []
+        with state_lock:
+            start_count = state['session_count']
+        end_count = download_images_from_listing(listing, start_count, listing_counter, row_sink=rows.append)
+        with state_lock:
+            state['session_count'] += end_count - start_count
+        return rows
+
+    def write_rows(seq, rows):
+        for row in rows or []:
+            write_listing_row(row)
+        state['processed'] += 1
+        processed_count = state['processed']
+        if total_listings:
+            print(f"Finished listing {processed_count}/{total_listings} ({(processed_count/total_listings)*100:.1f}%)")
+        else:
+            print(f"Finished listing {processed_count}")
+
+    print(f"Processing {total_listings or 'queued'} listings with {MAX_WORKERS} workers ({PER_HOST_CONCURRENCY} per host)")
+    engine.run(all_listings, fetch_listing, write_rows)
+    return state['processed'] - state['skipped']
+
+def scrape_listings_pipelined(pages, first_id=1):
+    """
+    Overlap search pagination with detail processing. A producer thread walks
+    the search pages and puts each new listing stub on a bounded queue; the
+    detail workers consume it right away. When the queue is full the producer
+    blocks, so memory stays bounded however far pagination runs ahead.
+    """
+    work_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    found = {'listings': 0, 'skipped': 0}
+
+    def produce():
+        try:
+            for page_cards in pages:
+                for card in page_cards:
+                    found['listings'] += 1
+                    # Skip listings a previous run already completed
+                    if RESUME_CRAWL and card.url in SEEN_URLS:
+                        found['skipped'] += 1
+                        continue
+                    work_queue.put(card)
+        except Exception as e:
+            print(f"Error crawling search pages: {e}")
+            traceback.print_exc()
+        finally:
+            # Sentinel: no more listings are coming
+            work_queue.put(None)
+
+    producer = threading.Thread(target=produce, name='search-pages', daemon=True)
+    producer.start()
+    listing_ids = []
+    processed_count = scrape_listings_concurrently(number_listings(queue_jobs(work_queue), first_id, listing_ids),
+                                                   first_id, listing_ids=listing_ids)
+    producer.join()
+    print(f"Found {found['listings']} listings across all pages, "
+          f"skipped {found['skipped']} completed in earlier runs")
+    return processed_count
+
+def scroll_to_bottom(url, max_scrolls=MAX_SCROLLS):
     """
     Use Selenium to scroll to the bottom of an infinite scrolling page
     and return the HTML content after scrolling
     """
     print(f"Starting Selenium to handle infinite scrolling: {url}")
     
-    # Set up Chrome options
-    chrome_options = ChromeOptions()
-    chrome_options.add_argument("--headless=new")  # Run in headless mode (new syntax)
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--disable-blink-features=AutomationControlled")  # Hide automation
-    chrome_options.add_argument("--window-size=1920,1080")
-    chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36")
-    
-    # Set up Firefox options as a fallback
-    firefox_options = FirefoxOptions()
-    firefox_options.add_argument("--headless")
-    firefox_options.add_argument("--no-sandbox")
-    firefox_options.add_argument("--disable-dev-shm-usage")
-    firefox_options.add_argument("--window-size=1920,1080")
-    firefox_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Firefox/119.0 Safari/537.36")
-    
     try:
-        # Try to initialize Chrome driver
-        try:
-            driver = webdriver.Chrome(options=chrome_options)
-        except WebDriverException:
-            # If Chrome fails, try Firefox
-            driver = webdriver.Firefox(options=firefox_options)
+        # Borrow a running browser from the pool (started on first use)
+        with DRIVER_POOL.driver() as driver:
+            # Go to the URL
+            with TRACER.span('page_load'):
+                driver.get(url)
+            print("Page loaded in Selenium")
         
-        # Go to the URL
-        driver.get(url)
-        print("Page loaded in Selenium")
+            # Probes the live page; waits end as soon as the page stops changing
+            settler = PageSettler(SEARCH_SELECTORS, 'search', idle_seconds=WAIT_IDLE_SECONDS,
+                                  poll_seconds=WAIT_POLL_SECONDS, event_driven=EVENT_DRIVEN_WAITS,
+                                  stats=WAIT_STATS, tracer=TRACER)
         
-        # Give the page time to load initially
-        time.sleep(10)
+            # Give the page time to load initially
+            probe = settler.settle(driver, 10)
         
-        # Try to wait for specific Craigslist elements to load
-        wait = WebDriverWait(driver, 15)
-        try:
-            # Wait for the content div which usually contains listings
-            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.content")))
-            print("Found content div")
-        except TimeoutException:
+            # Try to wait for specific Craigslist elements to load
+            wait = WebDriverWait(driver, 15)
             try:
-                # Try alternative selectors
-                wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, ".gallery-card")))
-                print("Found gallery cards")
+                # Wait for the content div which usually contains listings
+                wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.content")))
+                print("Found content div")
             except TimeoutException:
-                print("Could not find expected elements, continuing anyway")
-        
-        # Take a screenshot for debugging
-        driver.save_screenshot("before_scroll.png")
-        print("Saved screenshot of page before scrolling")
-        
-        # Define a function to count listings using various selectors
-        def count_listings():
-            selectors = [
-                '.gallery-card', 
-                'li.cl-static-search-result', 
-                'ol.cl-search-result-list > li',
-                'ul.rows li.cl-static-search-result',
-                'div.content .cl-search-result',
-                'div.content li',  # More generic fallback
-                'div.gallery li',  # Another gallery view option
-                'div.gallery-card',  # Alternative gallery card
-                'div[class*="gallery"] li',  # Wildcard selector for gallery
-                'div.content div[class*="result"]',  # Wildcard for result items
-                'li.result-row',
-                'li[data-pid]'  # Items with data-pid are usually listings
-            ]
-            
-            for selector in selectors:
-                elements = driver.find_elements(By.CSS_SELECTOR, selector)
-                if len(elements) > 0:
-                    print(f"Found {len(elements)} listings with selector: {selector}")
-                    return len(elements), selector
+                try:
+                    # Try alternative selectors
+                    wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, ".gallery-card")))
+                    print("Found gallery cards")
+                except TimeoutException:
+                    print("Could not find expected elements, continuing anyway")
+        
+            # Take a screenshot for debugging
+            if SELENIUM_DEBUG:
+                driver.save_screenshot("before_scroll.png")
+                print("Saved screenshot of page before scrolling")
+        
+            # Define a function to count listings using various selectors
+            def count_listings(probe):
+                # The probe already counted every selector; go straight to the one
+                # that matched this layout before
+                count, selector = SELECTOR_CACHE.select_count(probe['fingerprint'], SEARCH_SELECTORS, probe['counts'])
+                if count:
+                    print(f"Found {count} listings with selector: {selector}")
+                    return count, selector
             
-            return 0, None
+                return 0, None
         
-        # Initial count
-        listing_count, used_selector = count_listings()
-        print(f"Initial listing count: {listing_count} using selector: {used_selector}")
+            # Initial count
+            probe = settler.probe(driver)
+            listing_count, used_selector = count_listings(probe)
+            print(f"Initial listing count: {listing_count} using selector: {used_selector}")
         
-        # Scroll down to load more content
-        last_height = driver.execute_script("return document.body.scrollHeight")
-        scrolls_without_change = 0
-        total_scrolls = 0
-        prev_listing_count = listing_count
+            # Scroll down to load more content
+            last_height = probe['height']
+            scrolls_without_change = 0
+            total_scrolls = 0
+            prev_listing_count = listing_count
         
-        print("Starting to scroll...")
+            print("Starting to scroll...")
         
-        # Craigslist sometimes uses a "next page" button instead of infinite scroll
-        # Check if there's a next page button
-        try:
-            next_buttons = driver.find_elements(By.XPATH, "//a[contains(text(), 'next') or contains(@class, 'next') or contains(@title, 'next')]")
-            if next_buttons and len(next_buttons) > 0:
-                print("Found next page button - will use pagination instead of infinite scroll")
-                use_pagination = True
-            else:
+            # Craigslist sometimes uses a "next page" button instead of infinite scroll
+            # Check if there's a next page button
+            try:
+                next_buttons = driver.find_elements(By.XPATH, "//a[contains(text(), 'next') or contains(@class, 'next') or contains(@title, 'next')]")
+                if next_buttons and len(next_buttons) > 0:
+                    print("Found next page button - will use pagination instead of infinite scroll")
+                    use_pagination = True
+                else:
+                    use_pagination = False
+            except:
                 use_pagination = False
-        except:
-            use_pagination = False
         
-        # If using pagination
-        if use_pagination:
-            page = 1
-            all_page_sources = []
+            # If using pagination
+            if use_pagination:
+                page = 1
+                all_page_sources = []
             
-            while page <= 50:  # Limit to 50 pages max
-                print(f"Processing page {page}")
+                while page <= 50:  # Limit to 50 pages max
+                    print(f"Processing page {page}")
                 
-                # Add current page to sources
-                all_page_sources.append(driver.page_source)
+                    # Add current page to sources
+                    all_page_sources.append(driver.page_source)
                 
-                # Find and click next button
-                try:
-                    next_buttons = driver.find_elements(By.XPATH, "//a[contains(text(), 'next') or contains(@class, 'next') or contains(@title, 'next')]")
-                    if next_buttons and len(next_buttons) > 0 and next_buttons[0].is_displayed():
-                        next_buttons[0].click()
-                        print(f"Clicked next page button, going to page {page + 1}")
-                        time.sleep(5)  # Wait for page to load
-                        page += 1
+                    # Find and click next button
+                    try:
+                        next_buttons = driver.find_elements(By.XPATH, "//a[contains(text(), 'next') or contains(@class, 'next') or contains(@title, 'next')]")
+                        if next_buttons and len(next_buttons) > 0 and next_buttons[0].is_displayed():
+                            next_buttons[0].click()
+                            print(f"Clicked next page button, going to page {page + 1}")
+                            probe = settler.settle(driver, 5)  # Wait for page to load
+                            page += 1
                         
-                        # Count listings on new page
-                        new_count, _ = count_listings()
-                        print(f"Found {new_count} listings on page {page}")
-                    else:
-                        print("No more next buttons found, reached end of pagination")
+                            # Count listings on new page
+                            new_count, _ = count_listings(probe)
+                            print(f"Found {new_count} listings on page {page}")
+                        else:
+                            print("No more next buttons found, reached end of pagination")
+                            break
+                    except Exception as e:
+                        print(f"Error clicking next page: {e}")
                         break
-                except Exception as e:
-                    print(f"Error clicking next page: {e}")
-                    break
-            
-            # Combine all page sources
-            combined_html = "\n".join(all_page_sources)
             
-            # Take a screenshot after pagination
-            driver.save_screenshot("after_pagination.png")
-            print(f"Completed pagination through {page} pages")
+                # Combine all page sources
+                combined_html = "\n".join(all_page_sources)
             
-            # Close the driver
-            driver.quit()
+                # Take a screenshot after pagination
+                if SELENIUM_DEBUG:
+                    driver.save_screenshot("after_pagination.png")
+                print(f"Completed pagination through {page} pages")
+                print(WAIT_STATS.summary())
             
-            return combined_html
+                return combined_html
         
-        # If using infinite scroll
-        while scrolls_without_change < 5 and total_scrolls < max_scrolls:
-            # Scroll down
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            # If using infinite scroll
+            while scrolls_without_change < 5 and total_scrolls < max_scrolls:
+                # Scroll down
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
             
-            # Wait for new content to load
-            time.sleep(5)
+                # Wait for new content to load
+                probe = settler.settle(driver, 5)
             
-            # Try clicking "load more" buttons if they exist
-            try:
-                load_more_buttons = driver.find_elements(By.XPATH, "//button[contains(text(), 'load') or contains(text(), 'more') or contains(@class, 'load')]")
-                for button in load_more_buttons:
-                    if button.is_displayed():
-                        print("Clicking load more button")
-                        driver.execute_script("arguments[0].click();", button)  # Use JavaScript to click
-                        time.sleep(5)  # Wait for content to load
-            except Exception as e:
-                print(f"No load more button found or error: {e}")
+                # Try clicking "load more" buttons if they exist
+                try:
+                    load_more_buttons = driver.find_elements(By.XPATH, "//button[contains(text(), 'load') or contains(text(), 'more') or contains(@class, 'load')]")
+                    for button in load_more_buttons:
+                        if button.is_displayed():
+                            print("Clicking load more button")
+                            driver.execute_script("arguments[0].click();", button)  # Use JavaScript to click
+                            probe = settler.settle(driver, 5)  # Wait for content to load
+                except Exception as e:
+                    print(f"No load more button found or error: {e}")
             
-            # Calculate new scroll height
-            new_height = driver.execute_script("return document.body.scrollHeight")
+                # Calculate new scroll height
+                new_height = probe['height']
             
-            # Count listings
-            listing_count, used_selector = count_listings()
+                # Count listings
+                listing_count, used_selector = count_listings(probe)
             
-            # Check if we've reached the target number
-            if listing_count >= 1200:
-                print(f"Reached target number of listings ({listing_count}), stopping scrolling")
-                break
+                # Check if we've reached the target number
+                if listing_count >= TARGET_LISTINGS:
+                    print(f"Reached target number of listings ({listing_count}), stopping scrolling")
+                    break
                 
-            # Check if the listing count has increased
-            if listing_count > prev_listing_count:
-                print(f"Listing count increased: {prev_listing_count} -> {listing_count}")
-                scrolls_without_change = 0
-                prev_listing_count = listing_count
-            else:
-                scrolls_without_change += 1
-                print(f"No new listings found ({scrolls_without_change}/5)")
-            
-            # Check if the page height has changed
-            if new_height > last_height:
-                print(f"Page height increased: {last_height} -> {new_height}")
-                scrolls_without_change = 0
+                # Check if the listing count has increased
+                if listing_count > prev_listing_count:
+                    print(f"Listing count increased: {prev_listing_count} -> {listing_count}")
+                    scrolls_without_change = 0
+                    prev_listing_count = listing_count
+                else:
+                    scrolls_without_change += 1
+                    print(f"No new listings found ({scrolls_without_change}/5)")
             
-            last_height = new_height
-            total_scrolls += 1
-            print(f"Completed scroll {total_scrolls}/{max_scrolls}")
+                # Check if the page height has changed
+                if new_height > last_height:
+                    print(f"Page height increased: {last_height} -> {new_height}")
+                    scrolls_without_change = 0
             
-            # Execute some JavaScript to force loading more content
-            if total_scrolls % 5 == 0:
-                try:
-                    # Try to trigger lazy loading
-                    driver.execute_script("""
-                    window.scrollTo(0, 0);
-                    setTimeout(() => { window.scrollTo(0, document.body.scrollHeight); }, 500);
-                    """)
-                    time.sleep(2)
-                except:
-                    pass
-        
-        # Take a screenshot after scrolling
-        driver.save_screenshot("after_scroll.png")
-        print("Saved screenshot of page after scrolling")
-        
-        # Get the final page source
-        page_source = driver.page_source
-        
-        # Save the HTML for debugging
-        with open("debug_scroll_page.html", "w", encoding="utf-8") as f:
-            f.write(page_source)
+                last_height = new_height
+                total_scrolls += 1
+                print(f"Completed scroll {total_scrolls}/{max_scrolls}")
             
-        print(f"Scrolling complete. Performed {total_scrolls} scrolls. Found {listing_count} listings.")
+                # Execute some JavaScript to force loading more content
+                if total_scrolls % 5 == 0:
+                    try:
+                        # Try to trigger lazy loading
+                        driver.execute_script("""
+                        window.scrollTo(0, 0);
+                        setTimeout(() => { window.scrollTo(0, document.body.scrollHeight); }, 500);
+                        """)
+                        settler.settle(driver, 2)
+                    except:
+                        pass
         
-        # Close the driver
-        driver.quit()
+            # Take a screenshot after scrolling
+            if SELENIUM_DEBUG:
+                driver.save_screenshot("after_scroll.png")
+                print("Saved screenshot of page after scrolling")
         
-        return page_source
+            # Get the final page source
+            page_source = driver.page_source
+            
+            print(f"Scrolling complete. Performed {total_scrolls} scrolls. Found {listing_count} listings.")
+            print(WAIT_STATS.summary())
+        
+            # The driver goes back to the pool for the next page
+            return page_source
     
     except Exception as e:
+        # The pool quits a driver whose page raised, so there is nothing to clean up here
         print(f"Error during Selenium scrolling: {e}")
         traceback.print_exc()
+        return None
+
+def render_search_page(url, page):
+    """Render and scroll a search page in Selenium and return it parsed, or None"""
+    # Selenium bypasses the transport, so take a rate limiter slot here
+    delay = RATE_LIMITER.wait(url)
+    if delay > 0:
+        TRACER.record('delay', delay, host='selenium')
+    
+    # Get page source after scrolling
+    page_source = scroll_to_bottom(url, max_scrolls=MAX_SCROLLS)
+    if not page_source:
+        return None
+    
+    # Parse the scrolled page with BeautifulSoup
+    with TRACER.span('parse', kind='search'):
+        soup = make_soup(page_source, PARSER_BACKEND)
+    
+    # Archive the rendered HTML so the page can be replayed
+    ARCHIVE.write_resource(url, page_source)
+    print(f"Archived search page {page+1}")
+    return soup
+
+def request_search_page(url, page):
+    """Fetch a search page through the shared transport and return it parsed, or None"""
+    # Get fresh headers
+    headers = get_headers()
+    
+    # Get Tor session
+    session = get_tor_session()
+    
+    # Visit the listing page
+    try:
+        response = session.get(url, headers=headers, timeout=30, use_cache=True, archive=True)
+        if response.status_code != 200:
+            print(f"Failed to access listings page: {url}")
+            return None
         
-        # Make sure to quit the driver in case of exception
-        try:
-            driver.quit()
-        except:
-            pass
+        # Parse the HTML with BeautifulSoup
+        with TRACER.span('parse', kind='search'):
+            return make_soup(response.text, PARSER_BACKEND)
         
+    except Exception as e:
+        print(f"Error accessing listings page: {e}")
         return None
 
+def fetch_search_page(url, page):
+    """Return the parsed search page (Selenium first, plain request as fallback), or None"""
+    # Use Selenium to scroll the page and load all content
+    # (replay mode reads the archived search pages instead)
+    if not REPLAY_ARCHIVE:
+        soup = render_search_page(url, page)
+        if soup is not None:
+            return soup
+        print("Failed to scroll page with Selenium, falling back to regular requests")
+    
+    # Fallback to regular requests if Selenium fails
+    return request_search_page(url, page)
+
+def find_page_listings(soup, page):
+    """Find the search result cards on a parsed page, with increasingly aggressive fallbacks"""
+    # Try to find all car listings - the cached selector for this layout
+    # first, then the full list of selectors
+    with TRACER.span('selector', kind='search'):
+        fingerprint = layout_fingerprint(soup, 'search')
+        page_listings, used_selector = SELECTOR_CACHE.select(fingerprint, SEARCH_SELECTORS, soup.select)
+    if len(page_listings) > 0:
+        print(f"Found {len(page_listings)} listings on page {page+1} using selector: {used_selector}")
+    else:
+        used_selector = ""
+    
+    if len(page_listings) == 0:
+        print(f"Could not find any listings on page {page+1}. Trying more aggressive approach...")
+        
+        # Try to find listings by looking for common patterns in Craigslist listings
+        try:
+            # Look for elements with data-pid attribute (common in Craigslist listings)
+            page_listings = soup.select('[data-pid]')
+            if len(page_listings) > 0:
+                used_selector = '[data-pid]'
+                print(f"Found {len(page_listings)} listings on page {page+1} using data-pid attribute")
+            else:
+                # Look for links that might be listings
+                listing_links = soup.select('a[href*="/d/"]')  # Craigslist detail pages often have /d/ in URL
+                if len(listing_links) > 0:
+                    # Convert links to parent elements that might be listings
+                    potential_listings = []
+                    for link in listing_links:
+                        # Try to find a parent that might be a listing container
+                        parent = link
+                        for _ in range(3):  # Look up to 3 levels up
+                            parent = parent.parent
+                            if parent and parent.name in ['li', 'div'] and not parent in potential_listings:
+                                potential_listings.append(parent)
+                                break
+                    
+                    if potential_listings:
+                        page_listings = potential_listings
+                        used_selector = 'a[href*="/d/"] parents'
+                        print(f"Found {len(page_listings)} listings on page {page+1} by examining links to detail pages")
+        except Exception as e:
+            print(f"Error in aggressive listing detection on page {page+1}: {e}")
+    
+    return page_listings
+
+def search_page_needs_javascript(soup):
+    """
+    True when a search page that yielded no listings is a JavaScript app shell
+    rather than a genuine empty result page
+    """
+    if any(soup.select_one(marker) for marker in NO_RESULTS_MARKERS):
+        return False
+    return any(soup.select_one(marker) for marker in JS_SHELL_MARKERS)
+
+def read_search_cards(soup, page):
+    """
+    Return the page's ListingStubs and whether the page needs JavaScript
+    rendering to show its results. The parsed page is freed.
+    """
+    page_listings = find_page_listings(soup, page)
+    
+    # Keep only compact listing stubs and free the parsed page right away,
+    # so memory does not grow with every search page crawled
+    page_cards = extract_search_cards(soup, page_listings) if page_listings else []
+    needs_javascript = not page_cards and search_page_needs_javascript(soup)
+    soup.decompose()
+    return page_cards, needs_javascript
+
+def crawl_search_pages(base_url, max_pages=MAX_PAGES, target_listings=TARGET_LISTINGS):
+    """
+    Walk the search result pages and yield each page's ListingStubs as soon as
+    the page is parsed. Stops at max_pages, at an empty page, or once
+    target_listings have been found.
+    """
+    page_start = 0
+    found_count = 0
+    
+    # Process all pages
+    for page in range(max_pages):
+        # Construct URL with pagination parameter
+        if page == 0:
+            url = f"{base_url}"
+        else:
+            url = f"{base_url}&s={page_start}"
+            
+        print(f"\nScraping page {page+1} starting at item {page_start}")
+        print(f"URL: {url}")
+        
+        soup = fetch_search_page(url, page)
+        if soup is None:
+            continue
+        page_cards, _ = read_search_cards(soup, page)
+        
+        # If we found listings, hand them to the detail stage
+        if len(page_cards) > 0:
+            found_count += len(page_cards)
+            print(f"Added {len(page_cards)} listings from page {page+1}. Total listings so far: {found_count}")
+            
+            # Update start index for next page
+            page_start += len(page_cards)
+            yield page_cards
+        else:
+            print(f"No listings found on page {page+1}. This might be the last page.")
+            break
+            
+        # If we've collected enough listings (more than target_listings), we can stop
+        if found_count >= target_listings:
+            print(f"Reached target number of listings ({found_count} >= {target_listings}). Stopping pagination.")
+            break
+
+def fetch_search_cards_http(url, page):
+    """
+    Fetch and parse one search page without a browser. Returns (cards, needs_javascript);
+    cards is None when the page could not be fetched.
+    """
+    soup = request_search_page(url, page)
+    if soup is None:
+        return None, False
+    return read_search_cards(soup, page)
+
+def crawl_search_pages_http(base_url, max_pages=MAX_PAGES, target_listings=TARGET_LISTINGS):
+    """
+    Like crawl_search_pages, but fetches the offset pages (&s=0, 120, 240, ...)
+    over plain HTTP, up to SEARCH_CONCURRENCY at a time, and yields them in
+    page order. A page that turns out to need JavaScript is rendered in
+    Selenium instead.
+    """
+    found_count = 0
+    next_page = 0
+    pending = deque()
+    
+    with ThreadPoolExecutor(max_workers=SEARCH_CONCURRENCY) as executor:
+        try:
+            while True:
+                # Keep SEARCH_CONCURRENCY pages in flight ahead of the one being consumed
+                while next_page < max_pages and len(pending) < SEARCH_CONCURRENCY:
+                    url = base_url if next_page == 0 else f"{base_url}&s={next_page * SEARCH_PAGE_SIZE}"
+                    pending.append((next_page, url, executor.submit(fetch_search_cards_http, url, next_page)))
+                    next_page += 1
+                if not pending:
+                    break
+                
+                page, url, future = pending.popleft()
+                print(f"\nScraping page {page+1} starting at item {page * SEARCH_PAGE_SIZE}")
+                print(f"URL: {url}")
+                page_cards, needs_javascript = future.result()
+                if page_cards is None:
+                    continue
+                
+                if needs_javascript and not REPLAY_ARCHIVE:
+                    print(f"Page {page+1} needs JavaScript rendering, falling back to Selenium")
+                    soup = render_search_page(url, page)
+                    page_cards = read_search_cards(soup, page)[0] if soup is not None else []
+                
+                if len(page_cards) > 0:
+                    found_count += len(page_cards)
+                    print(f"Added {len(page_cards)} listings from page {page+1}. Total listings so far: {found_count}")
+                    yield page_cards
+                else:
+                    print(f"No listings found on page {page+1}. This might be the last page.")
+                    break
+                
+                if found_count >= target_listings:
+                    print(f"Reached target number of listings ({found_count} >= {target_listings}). Stopping pagination.")
+                    break
+        finally:
+            # Pages past the last one (or past the target) are not needed
+            for _, _, future in pending:
+                future.cancel()
+
+def replay_archive_parsing(archive=ARCHIVE):
+    """
+    Re-run detail-page parsing over every archived listing page with no network,
+    so parser changes can be checked and timed against a fixed corpus
+    """
+    page_count = 0
+    with_images = 0
+    parse_seconds = 0.0
+    for record in archive.records():
+        # Search pages are archived too; only detail pages have a posting ID path
+        if record.status != 200 or '/search/' in record.url:
+            continue
+        listing_data = {header: '' for header in CSV_HEADERS}
+        listing_data['URL'] = record.url
+        start = time.perf_counter()
+        detail_soup = parse_detail_page(record.body.decode('utf-8', errors='replace'), PARSER_BACKEND, TARGETED_PARSING)
+        img_url = parse_listing_details(detail_soup, listing_data, SELECTOR_CACHE, TRACER)
+        parse_seconds += time.perf_counter() - start
+        page_count += 1
+        if img_url:
+            with_images += 1
+    
+    if page_count:
+        print(f"Replayed {page_count} archived listing pages ({with_images} with images) "
+              f"in {parse_seconds:.2f}s, {parse_seconds / page_count * 1000:.1f} ms per page")
+    else:
+        print(f"No archived listing pages found in {archive.path}")
+    return page_count
+
+def search_pages(base_url):
+    """Search result pages as lists of ListingStubs, crawled as SEARCH_MODE says"""
+    if SEARCH_MODE == 'http':
+        return crawl_search_pages_http(base_url)
+    return crawl_search_pages(base_url)
+
+def enqueue_search_results(work_queue):
+    """Crawl the search pages and add every listing not completed before to the work queue"""
+    first_id = get_next_listing_id()
+    found_count = added_count = 0
+    for page_cards in search_pages(SEARCH_URL):
+        found_count += len(page_cards)
+        cards = [card for card in page_cards if not (RESUME_CRAWL and card.url in SEEN_URLS)]
+        added_count += work_queue.enqueue(cards, first_id)
+    print(f"Queued {added_count} new listings out of {found_count} found")
+    print(work_queue.summary())
+
+def run_queue_worker(work_queue):
+    """
+    Claim listings from the work queue one at a time and report each result
+    back, until nothing is pending or leased. A heartbeat thread keeps this
+    worker's leases alive while a listing is being processed.
+    """
+    global RATE_LIMITER
+    worker = f"{socket.gethostname()}-{os.getpid()}"
+    if SHARED_RATE_LIMIT:
+        # Every worker process paces itself against the same per-host buckets
+        RATE_LIMITER = TRANSPORT.rate_limiter = SharedHostRateLimiter(
+            WORK_QUEUE_FILE, rate=RATE_LIMIT_PER_SECOND, burst=RATE_LIMIT_BURST, host_rates=RATE_LIMIT_HOSTS)
+
+    stop = threading.Event()
+
+    def heartbeat():
+        while not stop.wait(WORK_LEASE_SECONDS / 3):
+            try:
+                work_queue.heartbeat(worker)
+            except Exception as e:
+                print(f"Heartbeat failed: {e}")
+
+    threading.Thread(target=heartbeat, name='heartbeat', daemon=True).start()
+    session_count = 0
+    processed_count = 0
+    print(f"Worker {worker} started on {WORK_QUEUE_FILE}")
+    try:
+        while True:
+            jobs = work_queue.claim(worker)
+            if not jobs:
+                if work_queue.outstanding() == 0:
+                    break
+                # Other workers still hold leases that may run out and come back
+                time.sleep(WORK_POLL_SECONDS)
+                continue
+            
+            for listing_id, fields in jobs:
+                card = ListingStub(**fields)
+                rows = []
+                try:
+                    session_count = download_images_from_listing(card, session_count, listing_id,
+                                                                 row_sink=rows.append)
+                    error = 'listing failed' if JOURNAL.failed(card.url) else None
+                except Exception as e:
+                    error = str(e)
+                
+                if error is None:
+                    work_queue.complete(card.url, worker, rows)
+                else:
+                    JOURNAL.forget_failure(card.url)
+                    retry = work_queue.fail(card.url, worker, error, rows)
+                    print(f"Listing {listing_id} failed ({error}), {'will retry' if retry else 'giving up'}")
+                processed_count += 1
+    finally:
+        stop.set()
+        work_queue.release(worker)
+        if TRACE_SPANS:
+            TRACER.close()
+    print(f"Worker {worker} finished: processed {processed_count} listings. {RATE_LIMITER.summary()}")
+    return processed_count
+
+def launch_queue_workers(count):
+    """Run `count` worker processes on this machine and wait for all of them"""
+    print(f"Starting {count} worker processes")
+    workers = [subprocess.Popen([sys.executable, os.path.abspath(__file__), 'worker']) for _ in range(count)]
+    for process in workers:
+        process.wait()
+
+def export_queue_results(work_queue):
+    """Write finished queue results to the output in listing ID order"""
+    jobs = work_queue.unexported()
+    try:
+        for url, state, rows in jobs:
+            if state == 'failed':
+                # Keeps the listing out of the seen set, so a later run retries it
+                JOURNAL.record(url, 'failed', stage='work_queue')
+            for row in rows:
+                write_listing_row(row)
+        OUTPUT.close()
+    finally:
+        SEEN_URLS.save()
+    work_queue.mark_exported([url for url, _, _ in jobs])
+    print(f"Exported {len(jobs)} listings to {OUTPUT_FILE}")
+    print(work_queue.summary())
+
+def run_work_queue(role, worker_count=MAX_WORKERS):
+    """Entry point for the work-queue roles"""
+    work_queue = WorkQueue(WORK_QUEUE_FILE, lease_seconds=WORK_LEASE_SECONDS, max_attempts=WORK_MAX_ATTEMPTS)
+    if role == 'enqueue':
+        enqueue_search_results(work_queue)
+    elif role == 'worker':
+        run_queue_worker(work_queue)
+    elif role == 'workers':
+        launch_queue_workers(worker_count)
+    elif role == 'export':
+        export_queue_results(work_queue)
+
+def run_planned_crawl(pages, first_id=1):
+    """
+    Budgeted crawl: collect the search pages (stopping early if the budget
+    runs out), order the listings with CrawlPlanner and process them until
+    the budget is spent. Returns the number of listings processed.
+    """
+    budget = CrawlBudget(seconds=CRAWL_BUDGET_SECONDS, requests=CRAWL_BUDGET_REQUESTS,
+                         request_count=lambda: TRANSPORT.stats.requests)
+    cards = []
+    for page_cards in pages:
+        cards.extend(page_cards)
+        if budget.exhausted():
+            print(f"Crawl budget exhausted during pagination. {budget.summary()}")
+            break
+    
+    planner = CrawlPlanner(load_known_listings(read_rows(OUTPUT_FILE, OUTPUT_FORMAT), JOURNAL.entries()),
+                           seen=SEEN_URLS, stale_after=STALE_AFTER_HOURS * 3600)
+    plan = planner.plan(cards, first_id)
+    jobs = within_budget((card for card, _, _ in plan), budget)
+    listing_ids = [listing_id for _, listing_id, _ in plan]
+    
+    if CONCURRENT_FETCH:
+        # The engine queues jobs ahead of the workers, so they check the budget too
+        processed_count = scrape_listings_concurrently(jobs, first_id, listing_ids=listing_ids,
+                                                       should_stop=budget.exhausted)
+    else:
+        session_count = 0
+        processed_count = 0
+        for card, listing_id in zip(jobs, listing_ids):
+            session_count = download_images_from_listing(card, session_count, listing_id)
+            processed_count += 1
+    print(budget.summary())
+    
+    # Refreshes were appended under their existing IDs: keep only the newest row per ID
+    if any(tier != 'new' for _, _, tier in plan):
+        replaced = OUTPUT.compact('ID')
+        print(f"Replaced {replaced} older rows of refreshed listings in {OUTPUT_FILE}")
+    return processed_count
+
 def main():
     """Main function to scrape Craigslist car listings"""
     try:
-        # Delete the existing CSV file to recreate with new headers
-        if os.path.exists(CSV_FILE):
-            os.remove(CSV_FILE)
-            print(f"Removed existing {CSV_FILE}")
+        if REPLAY_PARSE_ONLY:
+            replay_archive_parsing()
+            return
+        
+        if RESUME_CRAWL and os.path.exists(OUTPUT_FILE):
+            # Keep the rows we already have and skip completed listings below
+            print(f"Resuming crawl: keeping {OUTPUT_FILE}, {len(SEEN_URLS)} listings already completed")
+        else:
+            # Delete the existing output; the sink writes the headers again
+            if os.path.exists(OUTPUT_FILE):
+                OUTPUT.reset()
+                print(f"Removed existing {OUTPUT_FILE}")
             
-        # Create CSV file with headers
-        with open(CSV_FILE, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=CSV_HEADERS)
-            writer.writeheader()
-            print(f"Created new {CSV_FILE} with headers")
+            # A fresh crawl also starts a fresh journal and seen set, except in
+            # 'new' detail mode, which needs to know what earlier runs fetched
+            JOURNAL.reset()
+            if DETAIL_FETCH_MODE != 'new':
+                SEEN_URLS.reset()
             
         # Check if we should process a single listing directly
         direct_listing_mode = False
@@ -788,163 +1305,61 @@ def main():
             return
         
         # Base URL to scrape
-        base_url = "https://washingtondc.craigslist.org/search/cta?condition=10&condition=20&condition=30&condition=40&hasPic=1&isTrusted=true&max_auto_miles=150000&min_auto_year=1997&min_price=4500"
-        
-        # Initialize variables for pagination
-        all_listings = []
-        page_start = 0
-        page_size = 120  # Craigslist typically shows 120 results per page
-        max_pages = 15   # Set a reasonable limit to avoid infinite loops
-        
-        # Process all pages
-        for page in range(max_pages):
-            # Construct URL with pagination parameter
-            if page == 0:
-                url = f"{base_url}"
-            else:
-                url = f"{base_url}&s={page_start}"
-                
-            print(f"\nScraping page {page+1} starting at item {page_start}")
-            print(f"URL: {url}")
-            
-            # Use Selenium to scroll the page and load all content
-            use_selenium = True
-            page_source = None
-            
-            if use_selenium:
-                # Get page source after scrolling
-                page_source = scroll_to_bottom(url, max_scrolls=100)
-                if not page_source:
-                    print("Failed to scroll page with Selenium, falling back to regular requests")
-                    use_selenium = False
-                else:
-                    # Parse the scrolled page with BeautifulSoup
-                    soup = BeautifulSoup(page_source, 'html.parser')
-                    
-                    # Save the HTML for debugging
-                    with open(f"debug_search_page_{page+1}.html", "w", encoding="utf-8") as f:
-                        f.write(page_source)
-                    print(f"Saved search page {page+1} HTML for debugging")
-            
-            # Fallback to regular requests if Selenium fails
-            if not use_selenium:
-                # Get fresh headers
-                headers = get_headers()
-                
-                # Get Tor session
-                session = get_tor_session()
-                
-                # Visit the listing page
-                try:
-                    response = session.get(url, headers=headers, timeout=30)
-                    if response.status_code != 200:
-                        print(f"Failed to access listings page: {url}")
-                        continue
-                    
-                    # Parse the HTML with BeautifulSoup
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
-                    # Save the HTML for debugging
-                    with open(f"debug_search_page_{page+1}.html", "w", encoding="utf-8") as f:
-                        f.write(response.text)
-                    print(f"Saved search page {page+1} HTML for debugging")
-                    
-                except Exception as e:
-                    print(f"Error accessing listings page: {e}")
-                    continue
-            
-            # Try to find all car listings - using different selectors
-            selectors_to_try = [
-                '.gallery-card',  # Gallery view - most likely for the provided URL
-                'li.cl-static-search-result',
-                'ol.cl-search-result-list > li',
-                'ul.rows li.cl-static-search-result',
-                'div.content .cl-search-result',
-                'div.content li',  # More generic fallback
-                'div.gallery li',  # Another gallery view option
-                'div.gallery-card',  # Alternative gallery card
-                'div[class*="gallery"] li',  # Wildcard selector for gallery
-                'div.content div[class*="result"]',  # Wildcard for result items
-                'li.result-row',
-                'li[data-pid]'  # Items with data-pid are usually listings
-            ]
-            
-            page_listings = []
-            used_selector = ""
-            
-            for selector in selectors_to_try:
-                page_listings = soup.select(selector)
-                if len(page_listings) > 0:
-                    used_selector = selector
-                    print(f"Found {len(page_listings)} listings on page {page+1} using selector: {selector}")
-                    break
-            
-            if len(page_listings) == 0:
-                print(f"Could not find any listings on page {page+1}. Trying more aggressive approach...")
-                
-                # Try to find listings by looking for common patterns in Craigslist listings
-                try:
-                    # Look for elements with data-pid attribute (common in Craigslist listings)
-                    page_listings = soup.select('[data-pid]')
-                    if len(page_listings) > 0:
-                        used_selector = '[data-pid]'
-                        print(f"Found {len(page_listings)} listings on page {page+1} using data-pid attribute")
-                    else:
-                        # Look for links that might be listings
-                        listing_links = soup.select('a[href*="/d/"]')  # Craigslist detail pages often have /d/ in URL
-                        if len(listing_links) > 0:
-                            # Convert links to parent elements that might be listings
-                            potential_listings = []
-                            for link in listing_links:
-                                # Try to find a parent that might be a listing container
-                                parent = link
-                                for _ in range(3):  # Look up to 3 levels up
-                                    parent = parent.parent
-                                    if parent and parent.name in ['li', 'div'] and not parent in potential_listings:
-                                        potential_listings.append(parent)
-                                        break
-                            
-                            if potential_listings:
-                                page_listings = potential_listings
-                                used_selector = 'a[href*="/d/"] parents'
-                                print(f"Found {len(page_listings)} listings on page {page+1} by examining links to detail pages")
-                except Exception as e:
-                    print(f"Error in aggressive listing detection on page {page+1}: {e}")
-            
-            # If we found listings, add them to our master list
-            if len(page_listings) > 0:
-                all_listings.extend(page_listings)
-                print(f"Added {len(page_listings)} listings from page {page+1}. Total listings so far: {len(all_listings)}")
-                
-                # Update start index for next page
-                page_start += len(page_listings)
-                
-                # Add a delay before fetching the next page
-                random_delay(3, 8)
-            else:
-                print(f"No listings found on page {page+1}. This might be the last page.")
-                break
-                
-            # If we've collected enough listings (more than 1202), we can stop
-            if len(all_listings) >= 1202:
-                print(f"Reached target number of listings ({len(all_listings)} >= 1202). Stopping pagination.")
-                break
+        base_url = SEARCH_URL
+        
+        # New rows continue numbering after the rows already in the output
+        first_id = get_next_listing_id()
+        
+        # Search pages are produced lazily, one page of listing stubs at a time
+        pages = search_pages(base_url)
+        
+        if CRAWL_BUDGET_SECONDS is not None or CRAWL_BUDGET_REQUESTS is not None:
+            # Spend the budget on the listings that change the inventory most
+            processed_count = run_planned_crawl(pages, first_id)
+            print(f"Scraping completed! Processed {processed_count} listings within the crawl budget.")
+            return
+        
+        if PIPELINE_MODE and CONCURRENT_FETCH:
+            # Detail workers start on the first page while later pages are still crawled
+            processed_count = scrape_listings_pipelined(pages, first_id)
+            print(f"Scraping completed! Processed {processed_count} listings.")
+            return
+        
+        all_listings = [card for page_cards in pages for card in page_cards]
         
         print(f"\nTotal listings found across all pages: {len(all_listings)}")
         
+        # Skip listings a previous run already completed
+        if RESUME_CRAWL:
+            found_count = len(all_listings)
+            all_listings = [card for card in all_listings if card.url not in SEEN_URLS]
+            print(f"Skipping {found_count - len(all_listings)} listings completed in earlier runs")
+        
+        if DETAIL_FETCH_MODE != 'always':
+            detail_count = sum(1 for card in all_listings if should_fetch_detail(card.url))
+            print(f"Detail pages to fetch ({DETAIL_FETCH_MODE} mode): {detail_count}, "
+                  f"search card only: {len(all_listings) - detail_count}")
+        
+        # Listings retried after a failure in an earlier run keep their ID
+        listing_ids = []
+        all_listings = list(number_listings(all_listings, first_id, listing_ids))
+        
+        if CONCURRENT_FETCH and all_listings:
+            processed_count = scrape_listings_concurrently(all_listings, first_id, listing_ids=listing_ids)
+            print(f"Scraping completed! Processed {processed_count} out of {len(all_listings)} listings.")
+            return
+        
         # Process all collected listings
         session_count = 0
-        listing_counter = 1  # Initialize counter for sequential listing IDs
         
         # Create a progress counter
         total_listings = len(all_listings)
         processed_count = 0
         
-        for i, listing in enumerate(all_listings):
+        for listing, listing_counter in zip(all_listings, listing_ids):
             processed_count += 1
             print(f"\nProcessing listing {processed_count}/{total_listings} ({(processed_count/total_listings)*100:.1f}%)")
             session_count = download_images_from_listing(listing, session_count, listing_counter)
-            listing_counter += 1  # Increment the counter for the next listing
             
             # Print progress update every 50 listings
             if processed_count % 50 == 0:
@@ -955,6 +1370,39 @@ def main():
     except Exception as e:
         print(f"Error in main: {e}")
         traceback.print_exc()
+    finally:
+        # Write the last buffered rows before saving the seen set they update
+        OUTPUT.close()
+        print(f"{OUTPUT.rows_written} rows written to {OUTPUT_FILE}")
+        if RESUME_CRAWL:
+            # Retried listings were written again under their old IDs: keep only the newest row per ID
+            replaced = OUTPUT.compact('ID')
+            if replaced:
+                print(f"Replaced {replaced} older rows of retried listings in {OUTPUT_FILE}")
+        SEEN_URLS.save()
+        
+        # Shut down the browsers kept running between pages
+        DRIVER_POOL.close()
+        
+        # Show how much connection reuse the shared transport achieved
+        print(f"\nConnection pool statistics:\n{TRANSPORT.stats.summary()}")
+        if TRANSPORT.cache is not None:
+            print(TRANSPORT.cache.summary())
+        print(SELECTOR_CACHE.summary())
+        print(RATE_LIMITER.summary())
+        if WAIT_STATS.waits:
+            print(WAIT_STATS.summary())
+        if STREAM_STATS.pages:
+            print(STREAM_STATS.summary())
+        if DRIVER_POOL.started:
+            print(DRIVER_POOL.summary())
+        if TRACE_SPANS:
+            TRACER.close()
+            if os.path.exists(TRACE_FILE):
+                print(f"\nStage timings ({TRACE_FILE}):\n{trace_report(TRACE_FILE, TRACER.run_id)}")
         
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] in ('enqueue', 'worker', 'workers', 'export'):
+        run_work_queue(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else MAX_WORKERS)
+    else:
+        main()
\ No newline at end of file
@@ -0,0 +1,200 @@
+import os
+import csv
+import json
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+
+IMAGE_DIR = 'car_images'
+CSV_FILE = 'car_listings.csv'
+HASH_CACHE_FILE = 'perceptual_hashes.json'
+REPORT_FILE = 'duplicate_images.csv'
+
+MAX_DISTANCE = 6          # Hamming distance (out of 64 bits) that still counts as the same photo
+MERGE_DUPLICATES = False  # Also drop listings within MAX_DISTANCE of their group's first listing from the CSV
+
+def dhash(path, hash_size=8):
+    """64-bit difference hash: compares neighbouring pixels of a tiny grayscale thumbnail"""
+    with Image.open(path) as image:
+        small = image.convert('L').resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            value = (value << 1) | (1 if left > right else 0)
+    return value
+
+def _hash_file(filename):
+    try:
+        return filename, dhash(os.path.join(IMAGE_DIR, filename))
+    except Exception as e:
+        print(f"Could not hash {filename}: {e}")
+        return filename, None
+
+def compute_hashes():
+    """Hash every image, reusing cached hashes for files that have not changed"""
+    cache = {}
+    if os.path.exists(HASH_CACHE_FILE):
+        with open(HASH_CACHE_FILE, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+
+    hashes = {}
+    todo = []
+    for entry in os.scandir(IMAGE_DIR):
+        if entry.name.startswith('.') or not entry.name.lower().endswith(('.jpg', '.jpeg', '.png', '.webp')):
+            continue
+        stat = entry.stat()
+        cached = cache.get(entry.name)
+        if cached and cached['size'] == stat.st_size and cached['mtime'] == stat.st_mtime:
+            hashes[entry.name] = cached['dhash']
+        else:
+            todo.append((entry.name, stat))
+
+    print(f"{len(hashes)} hashes reused from cache, {len(todo)} images to hash")
+    if todo:
+        stats = dict(todo)
+        with ProcessPoolExecutor() as executor:
+            for filename, value in executor.map(_hash_file, [name for name, _ in todo], chunksize=32):
+                if value is None:
+                    continue
+                hashes[filename] = value
+                cache[filename] = {'size': stats[filename].st_size,
+                                   'mtime': stats[filename].st_mtime, 'dhash': value}
+
+    # Forget files that are gone, then save
+    cache = {name: cache[name] for name in hashes}
+    tmp_path = f"{HASH_CACHE_FILE}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, HASH_CACHE_FILE)
+    return hashes
+
+class MultiIndexHash:
+    """
+    Multi-index hashing for Hamming-distance search.
+
+    Each 64-bit hash is split into max_distance + 1 chunks and every chunk is
+    indexed separately. Two hashes within max_distance bits must agree exactly
+    on at least one chunk (pigeonhole), so only hashes sharing a chunk are ever
+    compared, instead of every pair.
+    """
+
+    def __init__(self, max_distance=MAX_DISTANCE, bits=64):
+        self.max_distance = max_distance
+        chunks = max_distance + 1
+        base, extra = divmod(bits, chunks)
+        self.chunk_bits = [base + (1 if i < extra else 0) for i in range(chunks)]
+        self.tables = [defaultdict(list) for _ in range(chunks)]
+        self.values = {}
+
+    def _chunks(self, value):
+        shift = 0
+        for width in self.chunk_bits:
+            yield (value >> shift) & ((1 << width) - 1)
+            shift += width
+
+    def add(self, key, value):
+        self.values[key] = value
+        for table, chunk in zip(self.tables, self._chunks(value)):
+            table[chunk].append(key)
+
+    def query(self, value):
+        """Return (key, distance) for every indexed hash within max_distance"""
+        candidates = set()
+        for table, chunk in zip(self.tables, self._chunks(value)):
+            candidates.update(table.get(chunk, ()))
+        matches = []
+        for key in candidates:
+            distance = bin(self.values[key] ^ value).count('1')
+            if distance <= self.max_distance:
+                matches.append((key, distance))
+        return matches
+
+def _find(parent, key):
+    while parent[key] != key:
+        parent[key] = parent[parent[key]]
+        key = parent[key]
+    return key
+
+def group_near_duplicates(hashes):
+    """Union every pair of images within MAX_DISTANCE and return groups of 2+ files"""
+    index = MultiIndexHash(MAX_DISTANCE)
+    parent = {}
+    skipped = 0
+    for filename in sorted(hashes):
+        value = hashes[filename]
+        # Flat or blank images (placeholders, error pages) hash to nearly all 0s or 1s
+        if bin(value).count('1') <= 2 or bin(value).count('1') >= 62:
+            skipped += 1
+            continue
+        parent[filename] = filename
+        for other, _ in index.query(value):
+            root_a, root_b = _find(parent, filename), _find(parent, other)
+            if root_a != root_b:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+        index.add(filename, value)
+    if skipped:
+        print(f"Skipped {skipped} blank or flat images")
+
+    groups = defaultdict(list)
+    for filename in parent:
+        groups[_find(parent, filename)].append(filename)
+    return [sorted(members) for members in groups.values() if len(members) > 1]
+
+def _listing_sort_key(row):
+    return int(row['ID']) if str(row.get('ID', '')).isdigit() else float('inf')
+
+def find_duplicate_images():
+    print(f"Hashing images in {IMAGE_DIR}...")
+    hashes = compute_hashes()
+    groups = group_near_duplicates(hashes)
+    print(f"Found {len(groups)} groups of near-identical photos")
+
+    rows = []
+    fieldnames = []
+    if os.path.exists(CSV_FILE):
+        with open(CSV_FILE, 'r', newline='', encoding='utf-8') as csvfile:
+            reader = csv.DictReader(csvfile)
+            fieldnames = reader.fieldnames
+            rows = list(reader)
+    rows_by_image = defaultdict(list)
+    for row in rows:
+        if row.get('ImageFileName'):
+            rows_by_image[row['ImageFileName']].append(row)
+
+    # Report every listing in each group, first (lowest ID) listing is the one to keep.
+    # Groups are chained (A~B and B~C puts A and C together), so a listing is only
+    # dropped if its own photo is within MAX_DISTANCE of the kept listing's photo.
+    drop_ids = set()
+    with open(REPORT_FILE, 'w', newline='', encoding='utf-8') as report:
+        writer = csv.writer(report)
+        writer.writerow(['Group', 'Keep', 'ID', 'Title', 'Price', 'ImageFileName', 'Distance'])
+        for group_number, members in enumerate(groups, 1):
+            listings = sorted((row for name in members for row in rows_by_image.get(name, [])),
+                              key=_listing_sort_key)
+            kept_hash = hashes[listings[0]['ImageFileName']] if listings else hashes[members[0]]
+            for name in members:
+                distance = bin(hashes[name] ^ kept_hash).count('1')
+                matched = [row for row in listings if row['ImageFileName'] == name]
+                if not matched:
+                    writer.writerow([group_number, '', '', '', '', name, distance])
+                for row in matched:
+                    keep = row is listings[0] or distance > MAX_DISTANCE
+                    if not keep:
+                        drop_ids.add(row['ID'])
+                    writer.writerow([group_number, 'yes' if keep else 'no', row['ID'],
+                                     row['Title'], row['Price'], name, distance])
+    print(f"Wrote {REPORT_FILE}: {len(drop_ids)} listings look like reposts of an earlier listing")
+
+    if MERGE_DUPLICATES and drop_ids and rows:
+        kept = [row for row in rows if row['ID'] not in drop_ids]
+        with open(CSV_FILE, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(kept)
+        print(f"Removed {len(rows) - len(kept)} duplicate listings from {CSV_FILE}")
+
+if __name__ == "__main__":
+    find_duplicate_images()
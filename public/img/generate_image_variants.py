@@ -0,0 +1,163 @@
+import os
+import io
+import json
+import base64
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from PIL import Image, ImageFilter, ImageOps
+
+SOURCE_DIR = 'car_images'
+OUTPUT_DIR = 'car_images_variants'
+MANIFEST_FILE = os.path.join(OUTPUT_DIR, 'manifest.json')
+
+# Width buckets for responsive images (srcset); sources are never upscaled
+VARIANT_WIDTHS = [320, 640, 960, 1200]
+VARIANT_FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 78, 'method': 4},
+    'jpg': {'format': 'JPEG', 'quality': 80, 'optimize': True, 'progressive': True},
+}
+PLACEHOLDER_WIDTH = 16      # Tiny blurred preview (LQIP) inlined as a data URI
+PLACEHOLDER_BLUR = 1.5
+
+def file_sha256(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def _resized(image, width):
+    height = max(round(image.height * width / image.width), 1)
+    return image.resize((width, height), Image.LANCZOS)
+
+def build_variants(filename):
+    """Encode every width/format variant and the placeholder for one image"""
+    source_path = os.path.join(SOURCE_DIR, filename)
+    source_hash = file_sha256(source_path)
+    stem = os.path.splitext(filename)[0]
+    with Image.open(source_path) as original:
+        # Respect camera rotation, then work in RGB for both JPEG and WebP
+        image = ImageOps.exif_transpose(original).convert('RGB')
+
+    widths = [w for w in VARIANT_WIDTHS if w < image.width]
+    # Always offer the largest size we have, capped at the biggest bucket
+    widths.append(min(image.width, VARIANT_WIDTHS[-1]))
+
+    variants = []
+    for width in sorted(set(widths)):
+        resized = image if width == image.width else _resized(image, width)
+        for extension, options in VARIANT_FORMATS.items():
+            variant_name = f"{stem}-{width}w.{extension}"
+            variant_path = os.path.join(OUTPUT_DIR, variant_name)
+            tmp_path = f"{variant_path}.tmp"
+            resized.save(tmp_path, **options)
+            os.replace(tmp_path, variant_path)
+            variants.append({
+                'file': variant_name,
+                'format': extension,
+                'width': resized.width,
+                'height': resized.height,
+                'bytes': os.path.getsize(variant_path),
+            })
+
+    placeholder = _resized(image, PLACEHOLDER_WIDTH).filter(ImageFilter.GaussianBlur(PLACEHOLDER_BLUR))
+    buffer = io.BytesIO()
+    placeholder.save(buffer, format='JPEG', quality=40)
+    stat = os.stat(source_path)
+    return filename, {
+        'sha256': source_hash,
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'width': image.width,
+        'height': image.height,
+        'variants': variants,
+        'placeholder': 'data:image/jpeg;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii'),
+    }
+
+def load_manifest():
+    if os.path.exists(MANIFEST_FILE):
+        try:
+            with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            print(f"Could not read {MANIFEST_FILE}, rebuilding every image")
+    return {}
+
+def save_manifest(manifest):
+    tmp_path = f"{MANIFEST_FILE}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, MANIFEST_FILE)
+
+def is_up_to_date(entry, path):
+    """True if the manifest entry still describes the source and all its variant files exist"""
+    if not entry:
+        return False
+    if not all(os.path.exists(os.path.join(OUTPUT_DIR, v['file'])) for v in entry['variants']):
+        return False
+    stat = os.stat(path)
+    if stat.st_size == entry['size'] and stat.st_mtime == entry['mtime']:
+        return True
+    # Touched but maybe not changed: compare content before re-encoding
+    if stat.st_size == entry['size'] and file_sha256(path) == entry['sha256']:
+        entry['mtime'] = stat.st_mtime
+        return True
+    return False
+
+def remove_variants(entry):
+    for variant in entry['variants']:
+        variant_path = os.path.join(OUTPUT_DIR, variant['file'])
+        if os.path.exists(variant_path):
+            os.remove(variant_path)
+
+def generate_image_variants(workers=None):
+    print(f"Scanning {SOURCE_DIR}...")
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    manifest = load_manifest()
+
+    sources = sorted(name for name in os.listdir(SOURCE_DIR)
+                     if name.lower().endswith(('.jpg', '.jpeg', '.png', '.webp')) and not name.startswith('.'))
+
+    # Drop variants of images that no longer exist
+    for filename in list(manifest):
+        if filename not in sources:
+            remove_variants(manifest.pop(filename))
+            print(f"Removed variants for deleted image: {filename}")
+
+    todo = [name for name in sources if not is_up_to_date(manifest.get(name), os.path.join(SOURCE_DIR, name))]
+    print(f"Found {len(sources)} images, {len(todo)} new or changed")
+
+    failed = 0
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(build_variants, name): name for name in todo}
+            for done, future in enumerate(as_completed(futures), 1):
+                name = futures[future]
+                try:
+                    filename, entry = future.result()
+                    old_entry = manifest.get(filename)
+                    if old_entry:
+                        # Widths can change when the source changes size
+                        stale = {v['file'] for v in old_entry['variants']} - {v['file'] for v in entry['variants']}
+                        remove_variants({'variants': [{'file': f} for f in stale]})
+                    manifest[filename] = entry
+                except Exception as e:
+                    failed += 1
+                    print(f"Error processing {name}: {e}")
+
+                # Save progress regularly so an interrupted run keeps finished work
+                if done % 50 == 0:
+                    save_manifest(manifest)
+                    print(f"Processed {done}/{len(todo)} images...")
+
+    save_manifest(manifest)
+    source_bytes = sum(entry['size'] for entry in manifest.values())
+    webp_bytes = sum(max((v['bytes'] for v in entry['variants'] if v['format'] == 'webp'), default=0)
+                     for entry in manifest.values())
+    print(f"Done! {len(todo) - failed} images encoded, {failed} failed. Manifest: {MANIFEST_FILE}")
+    if source_bytes:
+        print(f"Largest WebP variants total {webp_bytes / 1024 / 1024:.1f} MB "
+              f"vs {source_bytes / 1024 / 1024:.1f} MB of originals")
+
+if __name__ == "__main__":
+    generate_image_variants()
@@ -1,22 +1,30 @@
 import pandas as pd
 import re
 import csv
+from scraper_attrs import ATTRIBUTE_HEADERS
 
 def reformat_csv():
     print("Reading car_listings.csv...")
     
     try:
         # Read the CSV file with more robust parsing
+        # Attribute columns are read as text: with blanks pandas would turn
+        # Odometer and Cylinders into floats ("2000.0")
         df = pd.read_csv('car_listings.csv', quoting=csv.QUOTE_MINIMAL, 
-                         on_bad_lines='skip')
+                         on_bad_lines='skip', dtype={header: str for header in ATTRIBUTE_HEADERS},
+                         keep_default_na=False)
         
         # Create a new CSV file with the proper headers
         with open('car_listings_new.csv', 'w', newline='', encoding='utf-8') as outfile:
             writer = csv.writer(outfile)
             
+            # Typed attribute columns from newer scrapes are carried through after
+            # ImageFileName, so the positions of the other columns do not change
+            attribute_headers = [header for header in ATTRIBUTE_HEADERS if header in df.columns]
+            
             # Write the new headers in the specified order
             writer.writerow(['ID', 'Year', 'Make', 'Model', 'Price', 'Title', 'URL', 
-                            'MapAndAttrs', 'PostingBody', 'ImageFileName'])
+                            'MapAndAttrs', 'PostingBody', 'ImageFileName'] + attribute_headers)
             
             # Process each row
             for index, row in df.iterrows():
@@ -51,7 +59,7 @@ def reformat_csv():
                     row['MapAndAttrs'],
                     row['PostingBody'],
                     row['ImageFileName']
-                ])
+                ] + [row[header] for header in attribute_headers])
         
         print("Created car_listings_new.csv with new column structure")
         
@@ -0,0 +1,165 @@
+import io
+import os
+import json
+import gzip
+import uuid
+import threading
+import requests
+from datetime import datetime, timezone
+from http.client import responses as HTTP_REASONS
+
+class ArchiveRecord:
+    """One archived fetch: WARC headers plus the HTTP status, headers and body"""
+
+    def __init__(self, url, record_type, date, status, headers, body):
+        self.url = url
+        self.record_type = record_type
+        self.date = date
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def to_response(self):
+        """Rebuild a requests.Response so archived pages can replace live fetches"""
+        response = requests.models.Response()
+        response.status_code = self.status
+        response.url = self.url
+        response._content = self.body
+        response.headers.update(self.headers)
+        response.encoding = response.encoding or 'utf-8'
+        # Body is already in memory, so iter_content() must not read from a socket
+        response._content_consumed = True
+        response.from_archive = True
+        return response
+
+def _parse_header_block(block):
+    headers = {}
+    for line in block.split(b"\r\n"):
+        if b":" in line:
+            name, value = line.split(b":", 1)
+            headers[name.decode('latin-1').strip()] = value.decode('latin-1').strip()
+    return headers
+
+def _parse_record(stream):
+    """Read one WARC-like record from a decompressed stream, or return None at the end"""
+    line = stream.readline()
+    while line in (b"\r\n", b"\n"):
+        line = stream.readline()
+    if not line:
+        return None
+    header_lines = []
+    while True:
+        line = stream.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        header_lines.append(line.rstrip(b"\r\n"))
+    warc_headers = _parse_header_block(b"\r\n".join(header_lines))
+    block = stream.read(int(warc_headers['Content-Length']))
+
+    url = warc_headers.get('WARC-Target-URI', '')
+    record_type = warc_headers.get('WARC-Type', 'response')
+    date = warc_headers.get('WARC-Date', '')
+    if record_type == 'response':
+        # Block is a full HTTP response: status line, headers, blank line, body
+        head, _, body = block.partition(b"\r\n\r\n")
+        status_line, _, header_block = head.partition(b"\r\n")
+        status = int(status_line.split(b" ")[1])
+        headers = _parse_header_block(header_block)
+    else:
+        # Resource records (e.g. Selenium-rendered pages) hold the body only
+        status = 200
+        headers = {'Content-Type': warc_headers.get('Content-Type', 'text/html')}
+        body = block
+    return ArchiveRecord(url, record_type, date, status, headers, body)
+
+class ResponseArchive:
+    """
+    Append-only, gzip-compressed archive of raw responses in a WARC-like format.
+
+    Each record is written as its own gzip member, so the file can be appended
+    to across runs and read back as one stream. A JSONL index next to the
+    archive maps each URL to the offset and length of its latest record, so
+    replay can seek straight to a page without decompressing the whole file.
+    """
+
+    def __init__(self, path='crawl_archive.warc.gz'):
+        self.path = path
+        self.index_path = f"{path}.idx"
+        self._lock = threading.Lock()
+        self._index = None  # url -> (offset, length), loaded on first lookup
+
+    def _write(self, url, record_type, content_type, block):
+        warc_headers = (
+            "WARC/1.0\r\n"
+            f"WARC-Type: {record_type}\r\n"
+            f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>\r\n"
+            f"WARC-Date: {datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')}\r\n"
+            f"WARC-Target-URI: {url}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(block)}\r\n"
+            "\r\n"
+        ).encode('utf-8')
+        member = gzip.compress(warc_headers + block + b"\r\n\r\n")
+        with self._lock:
+            with open(self.path, 'ab') as f:
+                offset = f.tell()
+                f.write(member)
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'url': url, 'type': record_type,
+                                    'offset': offset, 'length': len(member)}) + "\n")
+            if self._index is not None:
+                self._index[url] = (offset, len(member))
+
+    def write_response(self, url, response):
+        """Archive a requests.Response with its status line and headers"""
+        reason = response.reason or HTTP_REASONS.get(response.status_code, '')
+        head = f"HTTP/1.1 {response.status_code} {reason}\r\n"
+        for name, value in response.headers.items():
+            # The stored body is already decoded, so drop transfer-level headers
+            if name.lower() in ('content-encoding', 'transfer-encoding', 'content-length'):
+                continue
+            head += f"{name}: {value}\r\n"
+        head += f"Content-Length: {len(response.content)}\r\n\r\n"
+        self._write(url, 'response', 'application/http; msgtype=response',
+                    head.encode('latin-1', errors='replace') + response.content)
+
+    def write_resource(self, url, html):
+        """Archive a page that did not come from a plain HTTP fetch (e.g. Selenium page source)"""
+        self._write(url, 'resource', 'text/html; charset=utf-8', html.encode('utf-8'))
+
+    def _load_index(self):
+        index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    index[entry['url']] = (entry['offset'], entry['length'])
+        return index
+
+    def get(self, url):
+        """Return the latest record archived for a URL, or None"""
+        with self._lock:
+            if self._index is None:
+                self._index = self._load_index()
+            location = self._index.get(url)
+        if location is None:
+            return None
+        offset, length = location
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            member = f.read(length)
+        return _parse_record(io.BytesIO(gzip.decompress(member)))
+
+    def records(self):
+        """Iterate over every record in the archive, in write order"""
+        if not os.path.exists(self.path):
+            return
+        with gzip.open(self.path, 'rb') as stream:
+            while True:
+                record = _parse_record(stream)
+                if record is None:
+                    break
+                yield record
@@ -0,0 +1,80 @@
+import re
+
+# Attribute labels from a detail page's .mapAndAttrs block -> CSV column
+ATTRIBUTE_COLUMNS = {
+    'condition': 'Condition',
+    'cylinders': 'Cylinders',
+    'drive': 'Drive',
+    'fuel': 'Fuel',
+    'odometer': 'Odometer',
+    'paint color': 'PaintColor',
+    'title status': 'TitleStatus',
+    'transmission': 'Transmission',
+    'type': 'BodyType',
+}
+
+# The attribute group heading without a label (e.g. "2006 jeep wrangler unlimited")
+VEHICLE_COLUMN = 'Vehicle'
+
+ATTRIBUTE_HEADERS = [VEHICLE_COLUMN] + list(ATTRIBUTE_COLUMNS.values())
+
+# Columns stored as numbers in typed outputs (jsonl/parquet)
+ATTRIBUTE_TYPES = {'Odometer': int, 'Cylinders': int}
+
+def _clean(text):
+    return re.sub(r'\s+', ' ', text or '').strip()
+
+def read_attribute_groups(map_attrs):
+    """
+    Read the label/value pairs of a .mapAndAttrs block straight from its
+    attribute group spans. Handles both layouts Craigslist serves:
+    <span>odometer: <b>38,600</b></span> and
+    <div class="attr"><span class="labl">odometer:</span><span class="valu">38,600</span></div>.
+    Returns (vehicle heading, {label: value}).
+    """
+    vehicle = ''
+    attrs = {}
+
+    for attr in map_attrs.select('.attrgroup .attr'):
+        label = attr.select_one('.labl')
+        value = attr.select_one('.valu')
+        if label is not None and value is not None:
+            attrs[_clean(label.get_text(' ')).rstrip(':').lower()] = _clean(value.get_text(' '))
+        elif not vehicle:
+            vehicle = _clean(attr.get_text(' '))
+
+    if not attrs:
+        for span in map_attrs.select('.attrgroup span'):
+            text = _clean(span.get_text(' '))
+            label, sep, value = text.partition(':')
+            if sep:
+                attrs[label.strip().lower()] = value.strip()
+            elif text and not vehicle:
+                vehicle = text
+
+    if not vehicle:
+        # Only a bold heading directly in the group: a <b> inside a span is a "label: value" value
+        heading = map_attrs.select_one('.attrgroup .year') or map_attrs.select_one('.attrgroup > b')
+        if heading is not None:
+            vehicle = _clean(heading.get_text(' '))
+    return vehicle, attrs
+
+def attribute_columns(map_attrs):
+    """
+    Return the typed attribute columns (ATTRIBUTE_HEADERS) for a .mapAndAttrs
+    block, or all-empty columns if there is none. Numbers are digits only
+    ("38,600" -> "38600", "6 cylinders" -> "6").
+    """
+    columns = {name: '' for name in ATTRIBUTE_HEADERS}
+    if map_attrs is None:
+        return columns
+
+    vehicle, attrs = read_attribute_groups(map_attrs)
+    columns[VEHICLE_COLUMN] = vehicle
+    for label, column in ATTRIBUTE_COLUMNS.items():
+        columns[column] = attrs.get(label, '')
+
+    for column in ATTRIBUTE_TYPES:
+        match = re.search(r'\d[\d,]*', columns[column])
+        columns[column] = match.group(0).replace(',', '') if match else ''
+    return columns
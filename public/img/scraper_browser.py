@@ -0,0 +1,143 @@
+import queue
+import threading
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+from selenium.webdriver.firefox.options import Options as FirefoxOptions
+from selenium.common.exceptions import WebDriverException
+
+CHROME_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36"
+FIREFOX_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Firefox/119.0 Safari/537.36"
+
+# Requests Chrome drops when resources are blocked (listing HTML and scripts still load)
+BLOCKED_URL_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.css',
+]
+
+def chrome_options(block_resources=True, eager=True):
+    """Headless Chrome options, optionally without images/fonts/CSS and with an eager page load"""
+    options = ChromeOptions()
+    options.add_argument("--headless=new")  # Run in headless mode (new syntax)
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-blink-features=AutomationControlled")  # Hide automation
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument(f"--user-agent={CHROME_USER_AGENT}")
+    if block_resources:
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_experimental_option('prefs', {
+            'profile.managed_default_content_settings.images': 2,
+            'profile.managed_default_content_settings.fonts': 2,
+            'profile.managed_default_content_settings.stylesheets': 2,
+        })
+    if eager:
+        # driver.get() returns at DOMContentLoaded instead of waiting for every subresource
+        options.page_load_strategy = 'eager'
+    return options
+
+def firefox_options(block_resources=True, eager=True):
+    """Headless Firefox options, used when Chrome cannot be started"""
+    options = FirefoxOptions()
+    options.add_argument("--headless")
+    options.add_argument("--width=1920")
+    options.add_argument("--height=1080")
+    options.set_preference("general.useragent.override", FIREFOX_USER_AGENT)
+    if block_resources:
+        options.set_preference("permissions.default.image", 2)
+        options.set_preference("permissions.default.stylesheet", 2)
+        options.set_preference("browser.display.use_document_fonts", 0)
+    if eager:
+        options.page_load_strategy = 'eager'
+    return options
+
+class DriverPool:
+    """
+    A few headless browsers started on first use and reused for every page.
+
+    Use `with pool.driver() as driver:`. A driver goes back to the pool when
+    the block finishes; if the block raises, the driver is quit and replaced
+    on the next request, since its state is unknown. Drivers are also
+    recycled after recycle_after pages to keep browser memory in check.
+    """
+
+    def __init__(self, size=1, block_resources=True, eager=True, recycle_after=50, tracer=None):
+        self.size = size
+        self.block_resources = block_resources
+        self.eager = eager
+        self.recycle_after = recycle_after
+        self.tracer = tracer
+        self._idle = queue.Queue()
+        self._slots = threading.Semaphore(size)
+        self._lock = threading.Lock()
+        self._uses = {}
+        self.started = 0
+        self.reused = 0
+
+    def _start(self):
+        try:
+            driver = webdriver.Chrome(options=chrome_options(self.block_resources, self.eager))
+            if self.block_resources:
+                # Also drop fonts/CSS/images requested by scripts, which the prefs miss
+                try:
+                    driver.execute_cdp_cmd('Network.enable', {})
+                    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+                except WebDriverException:
+                    pass
+        except WebDriverException:
+            # If Chrome fails, try Firefox
+            driver = webdriver.Firefox(options=firefox_options(self.block_resources, self.eager))
+        with self._lock:
+            self.started += 1
+        return driver
+
+    def _quit(self, driver):
+        self._uses.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    @contextmanager
+    def driver(self):
+        """Borrow a driver for one page"""
+        self._slots.acquire()
+        driver = None
+        try:
+            try:
+                driver = self._idle.get_nowait()
+                with self._lock:
+                    self.reused += 1
+            except queue.Empty:
+                if self.tracer is not None:
+                    with self.tracer.span('browser_start'):
+                        driver = self._start()
+                else:
+                    driver = self._start()
+
+            try:
+                yield driver
+            except BaseException:
+                self._quit(driver)
+                raise
+
+            uses = self._uses.get(id(driver), 0) + 1
+            if self.recycle_after and uses >= self.recycle_after:
+                self._quit(driver)
+            else:
+                self._uses[id(driver)] = uses
+                self._idle.put(driver)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Quit every idle driver"""
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._quit(driver)
+
+    def summary(self):
+        return f"Browser pool: {self.started} browsers started, {self.reused} page loads reused a running browser"
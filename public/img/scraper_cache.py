@@ -0,0 +1,119 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+import requests
+
+def _atomic_write(path, data):
+    """Write bytes to path through a temp file so readers never see a partial file"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+class ResponseCache:
+    """
+    Content-addressed on-disk HTTP response cache.
+
+    Each URL gets a small metadata file (status, ETag, Last-Modified, headers)
+    under meta/, and response bodies are stored once under bodies/, named by
+    the SHA-256 of their content.
+    """
+
+    # Response headers worth keeping for replay
+    KEPT_HEADERS = ['Content-Type', 'ETag', 'Last-Modified', 'Date']
+
+    def __init__(self, root='http_cache'):
+        self.root = root
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+    def _meta_path(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.root, 'meta', key[:2], f"{key}.json")
+
+    def _body_path(self, body_hash):
+        return os.path.join(self.root, 'bodies', body_hash[:2], body_hash)
+
+    def lookup(self, url):
+        """Return the stored metadata for a URL, or None if it is not cached"""
+        path = self._meta_path(url)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(self._body_path(meta['body'])):
+            return None
+        return meta
+
+    def conditional_headers(self, meta):
+        """Build If-None-Match / If-Modified-Since headers from a cache entry"""
+        headers = {}
+        if meta['headers'].get('ETag'):
+            headers['If-None-Match'] = meta['headers']['ETag']
+        if meta['headers'].get('Last-Modified'):
+            headers['If-Modified-Since'] = meta['headers']['Last-Modified']
+        return headers
+
+    def store(self, url, response):
+        """Save a 200 response body and its validators"""
+        body = response.content
+        body_hash = hashlib.sha256(body).hexdigest()
+        body_path = self._body_path(body_hash)
+        if not os.path.exists(body_path):
+            _atomic_write(body_path, body)
+        meta = {
+            'url': url,
+            'status': response.status_code,
+            'encoding': response.encoding,
+            'headers': {name: response.headers[name] for name in self.KEPT_HEADERS if name in response.headers},
+            'body': body_hash,
+            'stored_at': time.time(),
+        }
+        _atomic_write(self._meta_path(url), json.dumps(meta).encode('utf-8'))
+
+    def to_response(self, meta):
+        """Rebuild a requests.Response from a cache entry"""
+        with open(self._body_path(meta['body']), 'rb') as f:
+            body = f.read()
+        response = requests.models.Response()
+        response.status_code = meta['status']
+        response.url = meta['url']
+        response._content = body
+        response.encoding = meta.get('encoding')
+        response.headers.update(meta['headers'])
+        # Body is already in memory, so iter_content() must not read from a socket
+        response._content_consumed = True
+        response.from_cache = True
+        return response
+
+    def offline_miss(self, url):
+        """Response returned in cache-only mode when a URL was never cached"""
+        response = requests.models.Response()
+        response.status_code = 504
+        response.url = url
+        response._content = b''
+        response._content_consumed = True
+        response.from_cache = True
+        return response
+
+    def record(self, outcome):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def summary(self):
+        return (f"Cache hits: {self.hits}, revalidated (304): {self.revalidated}, "
+                f"misses: {self.misses}")
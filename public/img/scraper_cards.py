@@ -0,0 +1,140 @@
+import re
+import json
+from urllib.parse import urljoin
+
+BASE_URL = "https://washingtondc.craigslist.org"
+
+def get_listing_link(listing):
+    """Find the link to the detail page inside a search result"""
+    listing_link = listing.select_one('a.posting-title')
+    if not listing_link:
+        # Try an alternative selector for the link
+        listing_link = listing.select_one('a')
+    return listing_link
+
+def get_listing_url(listing):
+    """Return the full detail-page URL of a search result, or None"""
+    listing_link = get_listing_link(listing)
+    href = listing_link.get('href') if listing_link else None
+    if not href:
+        return None
+    return href if href.startswith('http') else urljoin(BASE_URL, href)
+
+def full_size_image_url(url):
+    """Turn a Craigslist thumbnail URL (e.g. ..._300x300.jpg) into the 1200x900 version"""
+    if not url:
+        return url
+    return re.sub(r'_\d+x\d+c?\.jpg$', '_1200x900.jpg', url)
+
+class ListingStub:
+    """
+    The few fields of a search result the crawl needs later. Holds plain
+    strings only, so no reference to the parsed search page survives.
+    """
+
+    __slots__ = ('url', 'title', 'price', 'thumbnail')
+
+    def __init__(self, url='', title='', price='', thumbnail=''):
+        self.url = url
+        self.title = title
+        self.price = price
+        self.thumbnail = thumbnail
+
+    def __repr__(self):
+        return f"ListingStub({self.url!r}, {self.title!r}, {self.price!r})"
+
+def extract_search_card(listing):
+    """
+    Read the fields a search result card carries (URL, title, price and
+    thumbnail) into a ListingStub. Missing fields are empty strings.
+    """
+    card = ListingStub(str(get_listing_url(listing) or ''))
+
+    price_span = listing.select_one('span.priceinfo') or listing.select_one('.price')
+    if price_span:
+        card.price = str(price_span.text.strip())
+
+    listing_link = get_listing_link(listing)
+    title_span = listing_link.select_one('span.label') if listing_link else None
+    if title_span:
+        card.title = str(title_span.text.strip())
+    else:
+        title_elem = listing.select_one('div.title')
+        if title_elem:
+            card.title = str(title_elem.text.strip())
+
+    img = listing.select_one('img')
+    if img:
+        for attr in ['src', 'data-src']:
+            src = img.get(attr)
+            if src and not src.endswith('blank.gif'):
+                card.thumbnail = str(src)
+                break
+        if not card.title:
+            # Alt text of the card image is the last resort for a title
+            card.title = str(img.get('alt', '').strip())
+    return card
+
+def _ld_json_price(price):
+    """ld+json prices look like "12500.00" or "12,500"; match the card format "$12,500" ('' if not a number)"""
+    if price in (None, ''):
+        return ''
+    try:
+        return f"${float(str(price).replace(',', '').lstrip('$')):,.0f}"
+    except ValueError:
+        return ''
+
+def _ld_json_image(image):
+    """Image URL from an ld+json image: a URL, an ImageObject or a list of either"""
+    if isinstance(image, list):
+        image = image[0] if image else ''
+    if isinstance(image, dict):
+        image = image.get('url') or image.get('contentUrl') or ''
+    return image if isinstance(image, str) else ''
+
+def parse_ld_json_cards(soup):
+    """
+    Return one {title, price, thumbnail} dict per item of the search page's
+    ld+json ItemList, in page order (empty if the page has none). Items that
+    are not objects or have malformed fields are skipped, so the list no
+    longer lines up with the cards and is not used.
+    """
+    items = []
+    for script in soup.select('script[type="application/ld+json"]'):
+        try:
+            data = json.loads(script.string or script.get_text())
+        except (TypeError, ValueError):
+            continue
+        if not isinstance(data, dict) or data.get('@type') != 'ItemList':
+            continue
+        for element in data.get('itemListElement', []):
+            item = element.get('item', element) if isinstance(element, dict) else None
+            if not isinstance(item, dict):
+                continue
+            try:
+                offers = item.get('offers') or {}
+                if isinstance(offers, list):
+                    offers = offers[0] if offers else {}
+                items.append({
+                    'title': str(item.get('name') or '').strip(),
+                    'price': _ld_json_price(offers.get('price') if isinstance(offers, dict) else None),
+                    'thumbnail': _ld_json_image(item.get('image')),
+                })
+            except (TypeError, ValueError, AttributeError):
+                continue
+    return items
+
+def extract_search_cards(soup, listings):
+    """
+    Build a ListingStub for every search result on a page. Fields the card markup
+    lacks are filled from the page's ld+json when it lists the same number of
+    results in the same order.
+    """
+    cards = [extract_search_card(listing) for listing in listings]
+    structured = parse_ld_json_cards(soup)
+    if structured and len(structured) == len(cards):
+        for card, item in zip(cards, structured):
+            for field in ('title', 'price', 'thumbnail'):
+                if not getattr(card, field):
+                    setattr(card, field, item[field])
+    return cards
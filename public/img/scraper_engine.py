@@ -0,0 +1,100 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import urlparse
+
+class HostLimiter:
+    """Cap the number of in-flight requests to any single host"""
+
+    def __init__(self, per_host=4):
+        self.per_host = per_host
+        self._lock = threading.Lock()
+        self._semaphores = {}
+
+    def _semaphore(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.per_host)
+            return self._semaphores[host]
+
+    def slot(self, url):
+        """Return a context manager that holds one request slot for the URL's host"""
+        return self._semaphore(url)
+
+class FetchEngine:
+    """
+    Run listing jobs on a bounded thread pool while keeping results in order.
+    Each job gets a sequence number when it is submitted, and results are
+    handed back strictly in that order no matter which fetch finishes first.
+    """
+
+    # A job source yields IDLE when it has no job yet (e.g. queue_jobs while
+    # the producer is still crawling search pages)
+    IDLE = object()
+
+    def __init__(self, max_workers=8, max_pending=None, idle_wait=0.5):
+        self.max_workers = max_workers
+        # Limit how many jobs (running or finished but not yet released) are held at once
+        self.max_pending = max_pending or max_workers * 2
+        # How long to wait for running jobs when the job source is idle
+        self.idle_wait = idle_wait
+
+    def run(self, jobs, worker, on_result):
+        """
+        Call worker(seq, job) for every job and on_result(seq, result) in
+        sequence order. Sequence numbers start at 1. jobs can be any iterable,
+        including a blocking one from queue_jobs().
+        """
+        results = {}
+        next_seq = 1
+        in_flight = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            def drain(timeout=None):
+                nonlocal next_seq
+                done, _ = wait(list(in_flight), timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    seq = in_flight.pop(future)
+                    try:
+                        results[seq] = future.result()
+                    except Exception as e:
+                        print(f"Error in fetch job {seq}: {e}")
+                        results[seq] = None
+                # Release every result whose predecessors have all finished
+                while next_seq in results:
+                    on_result(next_seq, results.pop(next_seq))
+                    next_seq += 1
+
+            seq = 0
+            for job in jobs:
+                if job is self.IDLE:
+                    # No new job yet: hand back finished results in the meantime
+                    if in_flight:
+                        drain(self.idle_wait)
+                    continue
+                seq += 1
+                if in_flight:
+                    # Release whatever already finished without blocking
+                    drain(0)
+                while len(in_flight) + len(results) >= self.max_pending:
+                    drain()
+                in_flight[executor.submit(worker, seq, job)] = seq
+
+            while in_flight:
+                drain()
+
+def queue_jobs(work_queue, poll_seconds=0.5):
+    """
+    Turn a queue into a job source for FetchEngine.run(). Yields FetchEngine.IDLE
+    while the queue is empty and stops at a None sentinel.
+    """
+    while True:
+        try:
+            job = work_queue.get(timeout=poll_seconds)
+        except queue.Empty:
+            yield FetchEngine.IDLE
+            continue
+        if job is None:
+            return
+        yield job
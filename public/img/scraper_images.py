@@ -0,0 +1,89 @@
+import os
+import shutil
+import hashlib
+import tempfile
+import threading
+from scraper_jsonmap import load_json_map, merge_json_map
+
+# mkstemp creates files as 0600; images must get normal permissions so the site can serve them
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+class ImageHashIndex:
+    """
+    Maps the SHA-256 of every downloaded image to the file that holds it,
+    so a repost of the same photo can be linked instead of written again.
+    Queue workers can share one index file: each add merges with the file on disk.
+    """
+
+    def __init__(self, path='car_images/.image_hashes.json'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._files = load_json_map(path)
+
+    def lookup(self, digest):
+        """Return an existing file with this content hash, or None"""
+        with self._lock:
+            path = self._files.get(digest)
+        return path if path and os.path.exists(path) else None
+
+    def add(self, digest, path):
+        with self._lock:
+            if self._files.get(digest) == path:
+                return
+            # Also picks up the hashes other workers added since this index was loaded
+            self._files = merge_json_map(self.path, {digest: path})
+
+def download_image(session, url, headers, dest_path, hash_index=None, chunk_size=64 * 1024):
+    """
+    Stream an image to dest_path without holding it in memory.
+
+    Chunks go to a temp file in the destination directory and are hashed on
+    the way through. The finished file is renamed into place, so a crash never
+    leaves a truncated image under the final name. If the same content was
+    already downloaded, the existing file is hardlinked to dest_path instead.
+
+    Returns a dict with status, path, sha256, bytes and duplicate_of.
+    """
+    result = {'status': None, 'path': dest_path, 'sha256': None, 'bytes': 0, 'duplicate_of': None}
+    response = session.get(url, headers=headers, timeout=30, stream=True)
+    try:
+        result['status'] = response.status_code
+        if response.status_code != 200:
+            return result
+
+        directory = os.path.dirname(dest_path) or '.'
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.part')
+        try:
+            sha = hashlib.sha256()
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in response.iter_content(chunk_size):
+                    f.write(chunk)
+                    sha.update(chunk)
+                    result['bytes'] += len(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_path, 0o666 & ~_UMASK)
+            result['sha256'] = digest = sha.hexdigest()
+
+            existing = hash_index.lookup(digest) if hash_index is not None else None
+            if existing and os.path.abspath(existing) != os.path.abspath(dest_path):
+                # Same bytes are already on disk: drop the copy and link to it
+                os.remove(tmp_path)
+                try:
+                    os.link(existing, tmp_path)
+                    result['duplicate_of'] = existing
+                except OSError:
+                    # Filesystem without hardlinks: fall back to a real copy
+                    shutil.copyfile(existing, tmp_path)
+            os.replace(tmp_path, dest_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        if hash_index is not None and not result['duplicate_of']:
+            hash_index.add(digest, dest_path)
+        return result
+    finally:
+        response.close()
@@ -0,0 +1,189 @@
+import os
+import json
+import math
+import time
+import struct
+import hashlib
+import threading
+
+def url_key(url):
+    """64-bit key for a URL, used by both the Bloom filter and the exact set"""
+    return hashlib.sha256(url.encode('utf-8')).digest()[:8]
+
+class BloomFilter:
+    """Fixed-size Bloom filter stored as a plain bytearray"""
+
+    def __init__(self, capacity=1000000, error_rate=0.01):
+        # Standard sizing: m = -n ln(p) / (ln 2)^2, k = (m / n) ln 2
+        self.num_bits = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.num_hashes = max(int(round(self.num_bits / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # Double hashing from the two halves of a digest of the key
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        h1, h2 = struct.unpack('<QQ', digest)
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def save(self, path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(struct.pack('<QQQ', self.num_bits, self.num_hashes, self.count))
+            f.write(self.bits)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        bloom = cls.__new__(cls)
+        with open(path, 'rb') as f:
+            bloom.num_bits, bloom.num_hashes, bloom.count = struct.unpack('<QQQ', f.read(24))
+            bloom.bits = bytearray(f.read())
+        return bloom
+
+class SeenUrlSet:
+    """
+    Compact on-disk set of completed listing URLs.
+
+    A Bloom filter answers most lookups (every new URL) without touching the
+    exact set. Only when the filter says "maybe" is the exact set of 8-byte
+    URL keys loaded from disk and checked, so false positives never skip work.
+    """
+
+    def __init__(self, prefix='seen_urls', capacity=1000000):
+        self.bloom_path = f"{prefix}.bloom"
+        self.keys_path = f"{prefix}.keys"
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._exact = None  # Loaded lazily on the first "maybe" from the filter
+        self._unsaved = 0
+
+        if os.path.exists(self.bloom_path):
+            self.bloom = BloomFilter.load(self.bloom_path)
+        else:
+            self.bloom = BloomFilter(capacity)
+
+        # The keys file is appended on every add, so it can be ahead of the
+        # filter after a crash. Rebuild the filter when that happens.
+        stored = os.path.getsize(self.keys_path) // 8 if os.path.exists(self.keys_path) else 0
+        if stored != self.bloom.count:
+            self.bloom = BloomFilter(capacity)
+            for key in self._read_keys():
+                self.bloom.add(key)
+            self.bloom.save(self.bloom_path)
+
+    def _read_keys(self):
+        if not os.path.exists(self.keys_path):
+            return []
+        with open(self.keys_path, 'rb') as f:
+            data = f.read()
+        return [data[i:i + 8] for i in range(0, len(data) - len(data) % 8, 8)]
+
+    def __contains__(self, url):
+        key = url_key(url)
+        with self._lock:
+            if key not in self.bloom:
+                return False
+            if self._exact is None:
+                self._exact = set(self._read_keys())
+            return key in self._exact
+
+    def __len__(self):
+        return self.bloom.count
+
+    def add(self, url):
+        key = url_key(url)
+        with self._lock:
+            if key in self.bloom:
+                if self._exact is None:
+                    self._exact = set(self._read_keys())
+                if key in self._exact:
+                    return
+            with open(self.keys_path, 'ab') as f:
+                f.write(key)
+            self.bloom.add(key)
+            if self._exact is not None:
+                self._exact.add(key)
+            # Saving the filter is cheap, but there is no need to do it for every URL
+            self._unsaved += 1
+            if self._unsaved >= 50:
+                self.bloom.save(self.bloom_path)
+                self._unsaved = 0
+
+    def save(self):
+        with self._lock:
+            self.bloom.save(self.bloom_path)
+            self._unsaved = 0
+
+    def reset(self):
+        """Forget every URL"""
+        with self._lock:
+            for path in (self.bloom_path, self.keys_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self.bloom = BloomFilter(self.capacity)
+            self._exact = None
+            self._unsaved = 0
+
+class CrawlJournal:
+    """
+    Append-only JSONL log of what happened to each listing URL.
+
+    Statuses: fetched, parsed, image_saved, failed, and written once the
+    listing's row is in the CSV.
+    """
+
+    STATUSES = ('fetched', 'parsed', 'image_saved', 'failed', 'written')
+
+    def __init__(self, path='crawl_journal.jsonl'):
+        self.path = path
+        self._lock = threading.Lock()
+        self._failed = set()  # URLs that hit a failure in this run
+
+    def record(self, url, status, **fields):
+        if status not in self.STATUSES:
+            raise ValueError(f"Unknown journal status: {status}")
+        entry = {'ts': time.time(), 'url': url, 'status': status}
+        entry.update(fields)
+        line = json.dumps(entry) + "\n"
+        with self._lock:
+            if status == 'failed':
+                self._failed.add(url)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+    def failed(self, url):
+        """True if anything went wrong for this URL in the current run"""
+        with self._lock:
+            return url in self._failed
+
+    def forget_failure(self, url):
+        """Clear a URL's failure before it is retried in this run"""
+        with self._lock:
+            self._failed.discard(url)
+
+    def entries(self):
+        """Iterate over every journal entry, skipping a torn last line"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def reset(self):
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self._failed = set()
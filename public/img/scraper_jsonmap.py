@@ -0,0 +1,47 @@
+import os
+import json
+from contextlib import contextmanager
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive lock on {path}.lock (across processes; a no-op where fcntl is missing)"""
+    with open(f"{path}.lock", 'a') as lock_file:
+        if HAS_FCNTL:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if HAS_FCNTL:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def load_json_map(path):
+    """Read a JSON object from path ({} if it is missing or unreadable)"""
+    if os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    return {}
+
+def merge_json_map(path, updates, indent=None):
+    """
+    Add updates to the JSON object in path and return the merged map.
+    The file is re-read under a lock right before it is rewritten, so entries
+    other processes sharing the file added since it was loaded are kept.
+    """
+    with file_lock(path):
+        merged = load_json_map(path)
+        merged.update(updates)
+        # Per-process temp name: several workers may be rewriting the same file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(merged, f, indent=indent)
+        os.replace(tmp_path, path)
+    return merged
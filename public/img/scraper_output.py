@@ -0,0 +1,232 @@
+import os
+import csv
+import json
+import time
+import shutil
+import threading
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+FORMATS = ('csv', 'jsonl', 'parquet')
+
+def _typed(row, fieldnames, types):
+    """Return the row's values converted with types (column -> callable); empty or bad values become None"""
+    typed = {}
+    for name in fieldnames:
+        value = row.get(name, '')
+        if name in types:
+            try:
+                value = types[name](value) if value not in ('', None) else None
+            except (TypeError, ValueError):
+                value = None
+        typed[name] = value
+    return typed
+
+class RowSink:
+    """
+    Long-lived, batched writer for scraped rows.
+
+    Rows are buffered and written when batch_size rows are waiting or
+    flush_seconds have passed since the last flush, and on close(). The file
+    handle stays open for the whole crawl.
+
+    csv:     one file, header written when the file is new
+    jsonl:   one JSON object per line, with typed values
+    parquet: a directory of part files, one per flush (needs pyarrow);
+             pandas.read_parquet() reads the directory as one table
+
+    on_flush(rows) is called after each batch is on disk, so callers can mark
+    rows complete only once they can no longer be lost. With a tracer, each
+    batch written is recorded as an output_write span with its row and byte counts.
+    """
+
+    def __init__(self, path, fieldnames, format='csv', batch_size=25, flush_seconds=10.0,
+                 types=None, on_flush=None, tracer=None):
+        if format not in FORMATS:
+            raise ValueError(f"Unknown output format: {format} (expected one of {', '.join(FORMATS)})")
+        if format == 'parquet' and not HAS_PYARROW:
+            raise ImportError("Parquet output needs pyarrow (pip install pyarrow)")
+        self.path = path
+        self.fieldnames = list(fieldnames)
+        self.format = format
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.types = types or {}
+        self.on_flush = on_flush
+        self.tracer = tracer
+        self.rows_written = 0
+        self.bytes_written = 0
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._file = None
+        self._writer = None
+        self._part = 0
+
+    def _open(self):
+        new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        if self.format == 'csv' and not new_file:
+            # Appending to a file written with other columns: keep its header
+            # so every row stays aligned (columns it lacks are left out)
+            with open(self.path, 'r', newline='', encoding='utf-8') as f:
+                header = next(csv.reader(f), None)
+            if header and header != self.fieldnames:
+                print(f"{self.path} has different columns, appending with its existing header")
+                self.fieldnames = header
+        self._file = open(self.path, 'a', newline='', encoding='utf-8')
+        if self.format == 'csv':
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames)
+            if new_file:
+                self._writer.writeheader()
+
+    def write(self, row):
+        """Buffer one row (a dict keyed by fieldnames)"""
+        with self._lock:
+            self._buffer.append(dict(row))
+            if len(self._buffer) >= self.batch_size or \
+                    time.monotonic() - self._last_flush >= self.flush_seconds:
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        if self._file is None and self.format != 'parquet':
+            self._open()
+        rows, self._buffer = self._buffer, []
+
+        start = time.time()
+        began = time.perf_counter()
+        if self.format == 'csv':
+            offset = self._file.tell()
+            self._writer.writerows({name: row.get(name, '') for name in self.fieldnames} for row in rows)
+            self._file.flush()
+            size = self._file.tell() - offset
+        elif self.format == 'jsonl':
+            offset = self._file.tell()
+            self._file.write(''.join(json.dumps(_typed(row, self.fieldnames, self.types)) + "\n" for row in rows))
+            self._file.flush()
+            size = self._file.tell() - offset
+        else:
+            size = os.path.getsize(self._write_parquet_part(rows))
+        if self.tracer is not None:
+            # The batch is not one listing's work, so it is not charged to the calling thread's listing
+            self.tracer.record('output_write', time.perf_counter() - began, start=start, listing=None,
+                               format=self.format, rows=len(rows), bytes=size)
+
+        self.rows_written += len(rows)
+        self.bytes_written += size
+        if self.on_flush is not None:
+            self.on_flush(rows)
+
+    def _write_parquet_part(self, rows):
+        os.makedirs(self.path, exist_ok=True)
+        columns = {name: [] for name in self.fieldnames}
+        for row in rows:
+            for name, value in _typed(row, self.fieldnames, self.types).items():
+                columns[name].append(value if name in self.types or value is None else str(value))
+        schema = pa.schema([(name, pa.int64() if self.types.get(name) is int else
+                             pa.float64() if self.types.get(name) is float else pa.string())
+                            for name in self.fieldnames])
+        table = pa.table(columns, schema=schema)
+        # Part names sort in write order; temp + rename so readers never see half a file
+        while True:
+            part_path = os.path.join(self.path, f"part-{time.strftime('%Y%m%d%H%M%S')}-{self._part:05d}.parquet")
+            self._part += 1
+            if not os.path.exists(part_path):
+                break
+        tmp_path = os.path.join(self.path, f".{os.path.basename(part_path)}.tmp")
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, part_path)
+        return part_path
+
+    def reset(self):
+        """Drop everything written so far (a fresh crawl)"""
+        with self._lock:
+            self._buffer = []
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                self._writer = None
+            if os.path.isdir(self.path):
+                shutil.rmtree(self.path)
+            elif os.path.exists(self.path):
+                os.remove(self.path)
+
+    def close(self):
+        """Flush whatever is buffered and close the file"""
+        with self._lock:
+            self._flush()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                self._writer = None
+
+    def compact(self, key='ID'):
+        """
+        Rewrite the output so each key keeps only its last row written, at the
+        position of its first row (a refreshed listing replaces its old row).
+        Returns the number of rows dropped.
+        """
+        self.close()
+        with self._lock:
+            rows = list(read_rows(self.path, self.format))
+            latest = {}
+            for row in rows:
+                # dict keeps first-insertion order; the value is the newest row
+                latest[str(row.get(key))] = row
+            dropped = len(rows) - len(latest)
+            if not dropped:
+                return 0
+
+            if self.format == 'parquet':
+                old_parts = [name for name in os.listdir(self.path) if name.endswith('.parquet')]
+                self._write_parquet_part(list(latest.values()))
+                for name in old_parts:
+                    os.remove(os.path.join(self.path, name))
+                return dropped
+
+            tmp_path = f"{self.path}.compact.tmp"
+            with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+                if self.format == 'csv':
+                    writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+                    writer.writeheader()
+                    writer.writerows(latest.values())
+                else:
+                    f.write(''.join(json.dumps(row) + "\n" for row in latest.values()))
+            os.replace(tmp_path, self.path)
+            return dropped
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def read_rows(path, format='csv'):
+    """Yield every row already written to an output as a dict"""
+    if not os.path.exists(path):
+        return
+    if format == 'csv':
+        with open(path, 'r', newline='', encoding='utf-8') as f:
+            yield from csv.DictReader(f)
+    elif format == 'jsonl':
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+    else:
+        for name in sorted(os.listdir(path)):
+            if name.endswith('.parquet'):
+                yield from pq.read_table(os.path.join(path, name)).to_pylist()
@@ -0,0 +1,209 @@
+import re
+from contextlib import nullcontext
+from bs4 import BeautifulSoup, SoupStrainer
+from scraper_attrs import ATTRIBUTE_HEADERS, attribute_columns
+from scraper_selectors import DETAIL_IMAGE_SELECTORS, layout_fingerprint
+
+try:
+    import lxml  # noqa: F401
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    HAS_SELECTOLAX = True
+except ImportError:
+    HAS_SELECTOLAX = False
+
+# The raw MapAndAttrs text is followed by the same attributes as typed columns
+CSV_HEADERS = (['ID', 'Title', 'Price', 'URL', 'MapAndAttrs'] + ATTRIBUTE_HEADERS +
+               ['PostingBody', 'ImageCount', 'ImageFileName'])
+
+# Backend names accepted by parse_detail_page() and make_soup()
+BACKENDS = ['html.parser', 'lxml', 'selectolax']
+
+# Detail-page nodes the scraper reads: title, price, attributes, body and gallery
+DETAIL_TAG_NAMES = {'title', 'picture', 'img'}
+DETAIL_IDS = {'postingbody', 'titletextonly'}
+DETAIL_CLASSES = {'mapAndAttrs', 'posting-title', 'postingtitletext', 'price', 'swipe-wrap', 'gallery'}
+
+def available_backends():
+    """Return the backends that can be used in this environment"""
+    backends = ['html.parser']
+    if HAS_LXML:
+        backends.append('lxml')
+    if HAS_SELECTOLAX:
+        backends.append('selectolax')
+    return backends
+
+def resolve_backend(backend):
+    """Fall back to the nearest installed backend if the requested one is missing"""
+    if backend in available_backends():
+        return backend
+    fallback = 'lxml' if HAS_LXML else 'html.parser'
+    print(f"Parser backend '{backend}' is not installed, using '{fallback}'")
+    return fallback
+
+def _is_detail_tag(name, attrs=None):
+    """True if a tag (and its subtree) is needed from a detail page"""
+    if name in DETAIL_TAG_NAMES:
+        return True
+    if not attrs:
+        return False
+    if attrs.get('id') in DETAIL_IDS:
+        return True
+    classes = attrs.get('class') or ''
+    if isinstance(classes, str):
+        classes = classes.split()
+    return any(cls in DETAIL_CLASSES for cls in classes)
+
+class DetailStrainer(SoupStrainer):
+    """
+    SoupStrainer that keeps only the detail-page nodes the scraper reads,
+    so BeautifulSoup never builds the rest of the tree
+    """
+
+    def __init__(self):
+        # bs4 < 4.13 calls the name filter with the tag name and attributes
+        super().__init__(name=_is_detail_tag)
+
+    # bs4 >= 4.13 asks these hooks instead
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        return _is_detail_tag(name, attrs)
+
+    def allow_string_creation(self, string):
+        return False
+
+class SelectolaxNode:
+    """
+    Wrap a selectolax node in the small part of the BeautifulSoup API the
+    scraper uses (select, select_one, get_text, attrs, decompose), so the same
+    extraction code runs on every backend
+    """
+
+    __slots__ = ('_node',)
+
+    def __init__(self, node):
+        self._node = node
+
+    def select_one(self, selector):
+        node = self._node.css_first(selector)
+        return SelectolaxNode(node) if node is not None else None
+
+    def select(self, selector):
+        return [SelectolaxNode(node) for node in self._node.css(selector)]
+
+    def get_text(self, separator='', strip=False):
+        return self._node.text(separator=separator, strip=strip)
+
+    @property
+    def text(self):
+        return self._node.text()
+
+    @property
+    def attrs(self):
+        return dict(self._node.attributes)
+
+    @property
+    def title(self):
+        return self.select_one('title')
+
+    def get(self, key, default=None):
+        return self._node.attributes.get(key, default)
+
+    def __getitem__(self, key):
+        return self._node.attributes[key]
+
+    def decompose(self):
+        self._node.decompose()
+
+def make_soup(html, backend='html.parser'):
+    """Build a full BeautifulSoup tree (search pages need the whole document)"""
+    builder = 'lxml' if backend in ('lxml', 'selectolax') and HAS_LXML else 'html.parser'
+    return BeautifulSoup(html, builder)
+
+def parse_detail_page(html, backend='html.parser', targeted=True):
+    """
+    Parse a listing detail page with the chosen backend. With targeted=True only
+    the nodes the scraper reads are built (bs4 backends) or the whole document is
+    handed to selectolax, which is fast enough to parse everything.
+    """
+    if backend == 'selectolax':
+        return SelectolaxNode(LexborHTMLParser(html).root)
+    parse_only = DetailStrainer() if targeted else None
+    return BeautifulSoup(html, backend, parse_only=parse_only)
+
+def parse_listing_details(detail_soup, listing_data, selector_cache=None, tracer=None):
+    """
+    Fill MapAndAttrs (raw text and typed attribute columns) and PostingBody
+    from a parsed detail page and return the URL of the first gallery image (or None).
+    Without a selector_cache the full image selector cascade runs every time;
+    without a tracer nothing is traced.
+    """
+    # Extract mapAndAttrs data
+    map_attrs = detail_soup.select_one('.mapAndAttrs')
+    if map_attrs:
+        # Get all text from mapAndAttrs and clean it up
+        map_attrs_text = map_attrs.get_text(separator=' ', strip=True)
+        # Remove excessive whitespace
+        map_attrs_text = re.sub(r'\s+', ' ', map_attrs_text)
+        listing_data['MapAndAttrs'] = map_attrs_text
+        print(f"MapAndAttrs found: {map_attrs_text[:100]}...")
+        
+        # Read the attribute groups as label/value pairs while the tree is in memory
+        listing_data.update(attribute_columns(map_attrs))
+    
+    # Extract posting body
+    posting_body = detail_soup.select_one('#postingbody')
+    if posting_body:
+        # Remove any "QR Code Link to This Post" text which is common in Craigslist
+        qr_link = posting_body.select_one('.print-qrcode-container')
+        if qr_link:
+            qr_link.decompose()
+            
+        body_text = posting_body.get_text(separator=' ', strip=True)
+        # Remove excessive whitespace
+        body_text = re.sub(r'\s+', ' ', body_text)
+        listing_data['PostingBody'] = body_text
+        print(f"Posting body found: {body_text[:100]}...")
+    
+    # Find image URLs on the detail page, starting with the selector that matched
+    # this layout last time and falling back to the full cascade
+    with tracer.span('selector', kind='detail_image') if tracer else nullcontext():
+        if selector_cache is not None:
+            fingerprint = layout_fingerprint(detail_soup, 'detail_image')
+            image_elements, selector = selector_cache.select(fingerprint, DETAIL_IMAGE_SELECTORS, detail_soup.select)
+        else:
+            image_elements, selector = [], None
+            for candidate in DETAIL_IMAGE_SELECTORS:
+                image_elements = detail_soup.select(candidate)
+                if image_elements:
+                    selector = candidate
+                    break
+    if image_elements:
+        print(f"Found {len(image_elements)} images with selector: {selector}")
+    
+    # Only process the first image
+    if image_elements:
+        img = image_elements[0]  # Take only the first image
+        img_url = None
+        
+        # Try several attributes where the image URL might be found
+        for attr in ['src', 'data-src', 'data-url', 'data-hq-url']:
+            if attr in img.attrs:
+                img_url = img[attr]
+                if img_url and not img_url.endswith('blank.gif'):
+                    break
+        
+        # Handle full-resolution images if available
+        if img_url and '600x450' in img_url:
+            # Try to get a higher resolution version
+            img_url = img_url.replace('600x450', '1200x900')
+            
+        print(f"Image URL found: {img_url}")
+    else:
+        img_url = None
+        print(f"No images found for listing: {listing_data['Title']}")
+    
+    return img_url
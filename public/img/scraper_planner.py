@@ -0,0 +1,135 @@
+import re
+import time
+
+# Work tiers in the order they are scheduled
+TIERS = ('new', 'price_changed', 'stale')
+
+def parse_price(text):
+    """Whole dollars from a price like "$12,500" (None if there is no number)"""
+    match = re.search(r'\d[\d,]*', str(text or ''))
+    return int(match.group(0).replace(',', '')) if match else None
+
+def load_known_listings(rows, journal_entries):
+    """
+    What earlier runs know about each listing URL: its row ID, last price and
+    when its row was last written. The last row for a URL wins.
+    """
+    known = {}
+    for row in rows:
+        url = row.get('URL')
+        if url:
+            known[url] = {'id': row.get('ID'), 'price': parse_price(row.get('Price')), 'updated': 0.0}
+    for entry in journal_entries:
+        if entry.get('status') == 'written' and entry.get('url') in known:
+            known[entry['url']]['updated'] = max(known[entry['url']]['updated'], entry.get('ts', 0.0))
+    return known
+
+class CrawlBudget:
+    """
+    A wall-clock and/or request budget for one crawl. request_count is a
+    callable returning the number of requests made so far (e.g. the
+    transport's counter); either limit can be None.
+    """
+
+    def __init__(self, seconds=None, requests=None, request_count=None):
+        self.seconds = seconds
+        self.requests = requests
+        self.request_count = request_count or (lambda: 0)
+        self._start_time = time.monotonic()
+        self._start_requests = self.request_count()
+
+    @property
+    def used_seconds(self):
+        return time.monotonic() - self._start_time
+
+    @property
+    def used_requests(self):
+        return self.request_count() - self._start_requests
+
+    def exhausted(self):
+        if self.seconds is not None and self.used_seconds >= self.seconds:
+            return True
+        return self.requests is not None and self.used_requests >= self.requests
+
+    def summary(self):
+        limits = []
+        if self.seconds is not None:
+            limits.append(f"{self.used_seconds:.0f}s of {self.seconds:g}s")
+        if self.requests is not None:
+            limits.append(f"{self.used_requests} of {self.requests} requests")
+        return f"Crawl budget used: {', '.join(limits) or 'unlimited'}"
+
+class CrawlPlanner:
+    """
+    Orders the listings found on the search pages by how much fetching them
+    changes the inventory:
+
+    new            never completed before, in search order (newest first)
+    price_changed  the search card shows a different price than the last row,
+                   biggest relative change first
+    stale          last written more than stale_after seconds ago, oldest first
+
+    Listings refreshed recently with an unchanged price are left out.
+    Refreshed listings keep their existing ID; the caller replaces the old
+    row with the new one (RowSink.compact) once the crawl is written.
+    """
+
+    def __init__(self, known, seen=None, stale_after=72 * 3600, now=None):
+        self.known = known
+        self.seen = seen if seen is not None else set()
+        self.stale_after = stale_after
+        self.now = now if now is not None else time.time()
+
+    def classify(self, card):
+        """Return (tier, sort key) for a listing stub; tier is None if it can wait"""
+        previous = self.known.get(card.url)
+        if previous is None:
+            if card.url in self.seen:
+                # Completed before, but its row is not in this output
+                return 'stale', 0.0
+            return 'new', 0.0
+
+        old_price, new_price = previous['price'], parse_price(card.price)
+        if old_price and new_price is not None and new_price != old_price:
+            return 'price_changed', -abs(new_price - old_price) / old_price
+        if self.now - previous['updated'] >= self.stale_after:
+            return 'stale', previous['updated']
+        return None, 0.0
+
+    def plan(self, cards, first_id=1):
+        """
+        Return [(card, listing_id, tier)] in scheduling order. New listings get
+        IDs from first_id on; refreshes reuse the listing's ID.
+        """
+        tiers = {tier: [] for tier in TIERS}
+        skipped = 0
+        for position, card in enumerate(cards):
+            tier, key = self.classify(card)
+            if tier is None:
+                skipped += 1
+            else:
+                tiers[tier].append((key, position, card))
+
+        planned = []
+        next_id = first_id
+        for tier in TIERS:
+            for _, _, card in sorted(tiers[tier], key=lambda item: (item[0], item[1])):
+                previous = self.known.get(card.url)
+                if previous and str(previous['id']).isdigit():
+                    listing_id = int(previous['id'])
+                else:
+                    listing_id = next_id
+                    next_id += 1
+                planned.append((card, listing_id, tier))
+
+        print(f"Crawl plan: {len(tiers['new'])} new, {len(tiers['price_changed'])} price changed, "
+              f"{len(tiers['stale'])} stale, {skipped} fresh and skipped")
+        return planned
+
+def within_budget(jobs, budget):
+    """Yield jobs until the budget runs out"""
+    for count, job in enumerate(jobs):
+        if budget.exhausted():
+            print(f"Crawl budget exhausted after {count} listings. {budget.summary()}")
+            return
+        yield job
@@ -0,0 +1,162 @@
+import sys
+import json
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    url TEXT PRIMARY KEY,
+    listing_id INTEGER NOT NULL,
+    card TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_until REAL,
+    error TEXT,
+    rows TEXT,
+    exported INTEGER NOT NULL DEFAULT 0,
+    updated REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, listing_id);
+"""
+
+def connect(path):
+    """
+    Open a SQLite connection for the queue file. Uses the default rollback
+    journal rather than WAL, so several machines can share the file over a
+    network filesystem (WAL needs shared memory on one host).
+    """
+    db = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+    db.execute('PRAGMA busy_timeout = 60000')
+    return db
+
+class WorkQueue:
+    """
+    Listing work queue in a SQLite file shared by worker processes.
+
+    Jobs move pending -> leased -> done, or back to pending on failure until
+    max_attempts is reached (then failed). claim() hands a job out with a
+    lease of lease_seconds; heartbeat() extends the leases a live worker
+    holds. A job whose lease runs out (its worker died) is handed out again.
+    Results (the listing's CSV rows) are stored with the job and written to
+    the output by the export step, in listing ID order.
+    """
+
+    def __init__(self, path='crawl_queue.sqlite', lease_seconds=120, max_attempts=3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        self._db().executescript(SCHEMA)
+
+    def _db(self):
+        # One connection per thread (the heartbeat runs on its own thread)
+        if getattr(self._local, 'db', None) is None:
+            self._local.db = connect(self.path)
+        return self._local.db
+
+    @contextmanager
+    def _transaction(self):
+        db = self._db()
+        # IMMEDIATE takes the write lock up front, so two workers can never claim the same job
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+    def enqueue(self, cards, first_id=1):
+        """Add listing stubs that are not queued yet, numbering them after every queued listing"""
+        added = 0
+        now = time.time()
+        with self._transaction() as db:
+            last_id = db.execute('SELECT MAX(listing_id) FROM jobs').fetchone()[0] or 0
+            next_id = max(last_id + 1, first_id)
+            for card in cards:
+                fields = {name: getattr(card, name) for name in card.__slots__}
+                cursor = db.execute('INSERT OR IGNORE INTO jobs (url, listing_id, card, updated) VALUES (?, ?, ?, ?)',
+                                    (card.url, next_id, json.dumps(fields), now))
+                if cursor.rowcount:
+                    next_id += 1
+                    added += 1
+        return added
+
+    def claim(self, worker, limit=1):
+        """Lease up to `limit` jobs to a worker; returns [(listing_id, card fields)]"""
+        now = time.time()
+        with self._transaction() as db:
+            # Leases that ran out on their last attempt are given up on
+            db.execute("UPDATE jobs SET state = 'failed', error = 'lease expired', updated = ? "
+                       "WHERE state = 'leased' AND lease_until < ? AND attempts >= ?",
+                       (now, now, self.max_attempts))
+            jobs = db.execute("SELECT url, listing_id, card FROM jobs "
+                              "WHERE state = 'pending' OR (state = 'leased' AND lease_until < ?) "
+                              "ORDER BY listing_id LIMIT ?", (now, limit)).fetchall()
+            for url, _, _ in jobs:
+                db.execute("UPDATE jobs SET state = 'leased', worker = ?, lease_until = ?, "
+                           "attempts = attempts + 1, updated = ? WHERE url = ?",
+                           (worker, now + self.lease_seconds, now, url))
+        return [(listing_id, json.loads(card)) for _, listing_id, card in jobs]
+
+    def heartbeat(self, worker):
+        """Extend every lease the worker holds; returns how many it holds"""
+        now = time.time()
+        with self._transaction() as db:
+            return db.execute("UPDATE jobs SET lease_until = ? WHERE state = 'leased' AND worker = ?",
+                              (now + self.lease_seconds, worker)).rowcount
+
+    def complete(self, url, worker, rows):
+        """Store a finished listing's rows"""
+        with self._transaction() as db:
+            db.execute("UPDATE jobs SET state = 'done', worker = ?, rows = ?, error = NULL, updated = ? "
+                       "WHERE url = ?", (worker, json.dumps(rows), time.time(), url))
+
+    def fail(self, url, worker, error, rows=None):
+        """
+        Put a failed listing back in the queue, or mark it failed once it has
+        used max_attempts (keeping its partial rows). Returns True if it will be retried.
+        """
+        with self._transaction() as db:
+            attempts = db.execute('SELECT attempts FROM jobs WHERE url = ?', (url,)).fetchone()[0]
+            retry = attempts < self.max_attempts
+            db.execute("UPDATE jobs SET state = ?, worker = ?, lease_until = NULL, error = ?, rows = ?, "
+                       "updated = ? WHERE url = ?",
+                       ('pending' if retry else 'failed', worker, error,
+                        json.dumps(rows) if rows else None, time.time(), url))
+        return retry
+
+    def release(self, worker):
+        """Give back a stopping worker's leases without using up an attempt"""
+        with self._transaction() as db:
+            return db.execute("UPDATE jobs SET state = 'pending', attempts = MAX(attempts - 1, 0), "
+                              "lease_until = NULL, updated = ? WHERE state = 'leased' AND worker = ?",
+                              (time.time(), worker)).rowcount
+
+    def outstanding(self):
+        """Jobs still pending or leased"""
+        return self._db().execute("SELECT COUNT(*) FROM jobs WHERE state IN ('pending', 'leased')").fetchone()[0]
+
+    def counts(self):
+        return dict(self._db().execute('SELECT state, COUNT(*) FROM jobs GROUP BY state').fetchall())
+
+    def unexported(self):
+        """Finished jobs not exported yet, in listing ID order: [(url, state, rows)]"""
+        jobs = self._db().execute("SELECT url, state, rows FROM jobs WHERE state IN ('done', 'failed') "
+                                  "AND exported = 0 ORDER BY listing_id").fetchall()
+        return [(url, state, json.loads(rows) if rows else []) for url, state, rows in jobs]
+
+    def mark_exported(self, urls):
+        with self._transaction() as db:
+            db.executemany('UPDATE jobs SET exported = 1 WHERE url = ?', [(url,) for url in urls])
+
+    def summary(self):
+        counts = self.counts()
+        states = ', '.join(f"{counts.get(state, 0)} {state}" for state in ('pending', 'leased', 'done', 'failed'))
+        return f"Work queue {self.path}: {states}"
+
+if __name__ == "__main__":
+    print(WorkQueue(sys.argv[1] if len(sys.argv) > 1 else 'crawl_queue.sqlite').summary())
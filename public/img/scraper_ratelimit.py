@@ -0,0 +1,201 @@
+import time
+import random
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+# Status codes that mean "slow down" and are retried after a backoff
+BACKOFF_STATUSES = (429, 503)
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delay in seconds or an HTTP date), or None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+class HostBucket:
+    """
+    Token bucket for one host, kept as a theoretical arrival time (GCRA):
+    requests are spaced 1/rate apart, with up to `burst` allowed back to back.
+    Each caller reserves its slot under the lock and then sleeps outside it,
+    so concurrent workers queue up fairly instead of polling.
+    """
+
+    def __init__(self, rate, burst):
+        self.interval = 1.0 / rate
+        self.tolerance = (burst - 1) * self.interval
+        self.tat = 0.0
+        self.blocked_until = 0.0
+        self.strikes = 0
+
+class HostRateLimiter:
+    """
+    Per-host request rate limiter shared by every worker thread.
+
+    wait(url) blocks until the URL's host may be hit again, at a steady
+    `rate` requests per second with bursts of `burst`. feedback(url, response)
+    pauses the host after a 429/503: for Retry-After seconds if the server
+    sent it, otherwise with exponential backoff (base_backoff * 2^n, capped
+    at max_backoff, with jitter) that resets on the next success.
+    """
+
+    def __init__(self, rate=0.5, burst=2, host_rates=None, base_backoff=5.0, max_backoff=300.0):
+        self.rate = rate
+        self.burst = burst
+        self.host_rates = host_rates or {}
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self.waits = 0
+        self.waited_seconds = 0.0
+        self.backoffs = 0
+
+    def _bucket(self, host):
+        if host not in self._buckets:
+            self._buckets[host] = HostBucket(self.host_rates.get(host, self.rate), self.burst)
+        return self._buckets[host]
+
+    def reserve(self, url):
+        """Reserve the next request slot for the URL's host and return how long to wait for it"""
+        host = urlparse(url).hostname
+        with self._lock:
+            bucket = self._bucket(host)
+            now = time.monotonic()
+            tat = max(bucket.tat, now)
+            allowed_at = max(tat - bucket.tolerance, bucket.blocked_until)
+            bucket.tat = max(tat, allowed_at) + bucket.interval
+            delay = max(allowed_at - now, 0.0)
+            if delay > 0:
+                self.waits += 1
+                self.waited_seconds += delay
+            return delay
+
+    def _blocked_for(self, url):
+        with self._lock:
+            bucket = self._bucket(urlparse(url).hostname)
+            return max(bucket.blocked_until - time.monotonic(), 0.0)
+
+    def wait(self, url):
+        """Block until a request to the URL's host is allowed; returns the seconds waited"""
+        waited = 0.0
+        delay = self.reserve(url)
+        while delay > 0:
+            time.sleep(delay)
+            waited += delay
+            # A backoff may have started while this caller was asleep
+            delay = self._blocked_for(url)
+        return waited
+
+    def _backoff_delay(self, strikes, response):
+        """Pause after the strikes-th 429/503 in a row: Retry-After, else jittered exponential backoff"""
+        delay = parse_retry_after(response.headers.get('Retry-After'))
+        if delay is None:
+            delay = min(self.base_backoff * 2 ** (strikes - 1), self.max_backoff)
+            delay *= random.uniform(0.75, 1.25)
+        return min(delay, self.max_backoff)
+
+    def feedback(self, url, response):
+        """Back off the host after a 429/503, or reset its backoff after a success"""
+        host = urlparse(url).hostname
+        with self._lock:
+            bucket = self._bucket(host)
+            if response.status_code not in BACKOFF_STATUSES:
+                bucket.strikes = 0
+                return 0.0
+            bucket.strikes += 1
+            self.backoffs += 1
+            delay = self._backoff_delay(bucket.strikes, response)
+            bucket.blocked_until = max(bucket.blocked_until, time.monotonic() + delay)
+        print(f"{host} answered {response.status_code}, pausing it for {delay:.1f} seconds")
+        return delay
+
+    def summary(self):
+        with self._lock:
+            return (f"Rate limiter: {self.waits} waits, {self.waited_seconds:.1f}s waiting, "
+                    f"{self.backoffs} backoffs after 429/503")
+
+class SharedHostRateLimiter(HostRateLimiter):
+    """
+    HostRateLimiter whose per-host buckets live in a SQLite file, so every
+    process using the same file (on one box, or several sharing a
+    filesystem) stays within one global rate per host. Uses wall-clock time,
+    since monotonic clocks are not comparable between processes.
+    """
+
+    def __init__(self, path, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._local = threading.local()
+        self._db().execute('CREATE TABLE IF NOT EXISTS rate_buckets ('
+                           'host TEXT PRIMARY KEY, tat REAL, blocked_until REAL, strikes INTEGER)')
+
+    def _db(self):
+        if getattr(self._local, 'db', None) is None:
+            self._local.db = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        return self._local.db
+
+    def _update(self, host, change):
+        """Run change(tat, blocked_until, strikes, now) -> (new state, result) under the file's write lock"""
+        db = self._db()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            row = db.execute('SELECT tat, blocked_until, strikes FROM rate_buckets WHERE host = ?',
+                             (host,)).fetchone() or (0.0, 0.0, 0)
+            state, result = change(*row, time.time())
+            db.execute('INSERT OR REPLACE INTO rate_buckets (host, tat, blocked_until, strikes) '
+                       'VALUES (?, ?, ?, ?)', (host, *state))
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+        return result
+
+    def reserve(self, url):
+        host = urlparse(url).hostname
+        bucket = HostBucket(self.host_rates.get(host, self.rate), self.burst)
+
+        def take_slot(tat, blocked_until, strikes, now):
+            tat = max(tat, now)
+            allowed_at = max(tat - bucket.tolerance, blocked_until)
+            return (max(tat, allowed_at) + bucket.interval, blocked_until, strikes), max(allowed_at - now, 0.0)
+
+        delay = self._update(host, take_slot)
+        if delay > 0:
+            with self._lock:
+                self.waits += 1
+                self.waited_seconds += delay
+        return delay
+
+    def _blocked_for(self, url):
+        row = self._db().execute('SELECT blocked_until FROM rate_buckets WHERE host = ?',
+                                 (urlparse(url).hostname,)).fetchone()
+        return max(row[0] - time.time(), 0.0) if row else 0.0
+
+    def feedback(self, url, response):
+        host = urlparse(url).hostname
+        backoff = response.status_code in BACKOFF_STATUSES
+
+        def record(tat, blocked_until, strikes, now):
+            if not backoff:
+                return (tat, blocked_until, 0), 0.0
+            delay = self._backoff_delay(strikes + 1, response)
+            return (tat, max(blocked_until, now + delay), strikes + 1), delay
+
+        delay = self._update(host, record)
+        if backoff:
+            with self._lock:
+                self.backoffs += 1
+            print(f"{host} answered {response.status_code}, pausing it for {delay:.1f} seconds")
+        return delay
@@ -0,0 +1,147 @@
+import hashlib
+import threading
+from scraper_jsonmap import load_json_map, merge_json_map
+
+# Selectors for search-result cards, most likely first
+SEARCH_SELECTORS = [
+    '.gallery-card',  # Gallery view - most likely for the provided URL
+    'li.cl-static-search-result',
+    'ol.cl-search-result-list > li',
+    'ul.rows li.cl-static-search-result',
+    'div.content .cl-search-result',
+    'div.content li',  # More generic fallback
+    'div.gallery li',  # Another gallery view option
+    'div.gallery-card',  # Alternative gallery card
+    'div[class*="gallery"] li',  # Wildcard selector for gallery
+    'div.content div[class*="result"]',  # Wildcard for result items
+    'li.result-row',
+    'li[data-pid]'  # Items with data-pid are usually listings
+]
+
+# A search page with no result cards that matches one of these was served as a
+# JavaScript app shell and has to be rendered in a browser. Only markers of the
+# search app itself: generic tags such as <noscript> are on static pages too...
+JS_SHELL_MARKERS = [
+    'div.cl-search-view',
+    'div.cl-content div.cl-results-page',
+]
+
+# ...unless it says outright that the search has no (more) results
+NO_RESULTS_MARKERS = [
+    '.cl-no-results',
+    '.noresults',
+    'div.no-results',
+]
+
+# Selectors for the gallery images on a detail page
+DETAIL_IMAGE_SELECTORS = [
+    'picture img',
+    'div.swipe-wrap img',
+    '.gallery img',
+    'img[data-src]',
+    'img'  # Last resort
+]
+
+# A few cheap DOM markers per page kind. Together with the <body> classes they
+# identify which layout Craigslist served, without running the full cascade.
+FINGERPRINT_MARKERS = {
+    'search': ['ol.cl-static-search-results', 'ol.cl-search-result-list', 'div.gallery'],
+    'detail_image': ['picture', 'div.swipe-wrap', '.gallery'],
+}
+
+def fingerprint_from_markers(kind, body_class, marker_hits):
+    """Build a fingerprint from the <body> class string and one hit flag per marker"""
+    body_classes = ' '.join(sorted((body_class or '').split()))
+    key = f"{kind}|{body_classes}|{''.join('1' if hit else '0' for hit in marker_hits)}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+def layout_fingerprint(doc, kind):
+    """Fingerprint a parsed page (BeautifulSoup or SelectolaxNode) from cheap markers"""
+    body = doc.select_one('body')
+    classes = body.attrs.get('class', '') if body is not None else ''
+    if isinstance(classes, list):
+        classes = ' '.join(classes)
+    return fingerprint_from_markers(kind, classes,
+                                    [doc.select_one(marker) is not None for marker in FINGERPRINT_MARKERS[kind]])
+
+def driver_fingerprint(driver, kind):
+    """Fingerprint the live Selenium DOM with a single script call"""
+    result = driver.execute_script(
+        "var markers = arguments[0];"
+        "return [document.body ? document.body.className : '']"
+        ".concat(markers.map(function (m) { return document.querySelector(m) !== null; }));",
+        FINGERPRINT_MARKERS[kind])
+    return fingerprint_from_markers(kind, result[0], result[1:])
+
+class SelectorCache:
+    """
+    Remembers, per layout fingerprint, which selector in a cascade matched last
+    time. Persisted as JSON so later runs go straight to the winning selector;
+    each new winner is merged with the file on disk, so workers can share it.
+    """
+
+    def __init__(self, path='selector_cache.json'):
+        self.path = path
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.cascades = 0
+        self._winners = load_json_map(path)
+
+    def get(self, fingerprint):
+        with self._lock:
+            return self._winners.get(fingerprint)
+
+    def put(self, fingerprint, selector):
+        with self._lock:
+            if self._winners.get(fingerprint) == selector:
+                return
+            self._winners = merge_json_map(self.path, {fingerprint: selector}, indent=2)
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.cascades += 1
+
+    def select(self, fingerprint, selectors, run_selector):
+        """
+        Return (elements, selector) using the cached winner for this fingerprint,
+        falling back to the full cascade when it is unknown or no longer matches.
+        run_selector(selector) must return a list of matches.
+        """
+        cached = self.get(fingerprint)
+        if cached:
+            elements = run_selector(cached)
+            if elements:
+                self.record(hit=True)
+                return elements, cached
+
+        self.record(hit=False)
+        for selector in selectors:
+            elements = run_selector(selector)
+            if elements:
+                self.put(fingerprint, selector)
+                return elements, selector
+        return [], None
+
+    def select_count(self, fingerprint, selectors, counts):
+        """
+        Same as select(), but over match counts that were already collected for
+        every selector (e.g. by one browser-side probe). Returns (count, selector).
+        """
+        counts = dict(zip(selectors, counts))
+        cached = self.get(fingerprint)
+        if cached and counts.get(cached):
+            self.record(hit=True)
+            return counts[cached], cached
+
+        self.record(hit=False)
+        for selector in selectors:
+            if counts[selector]:
+                self.put(fingerprint, selector)
+                return counts[selector], selector
+        return 0, None
+
+    def summary(self):
+        return f"Selector cache: {self.hits} direct hits, {self.cascades} full cascades"
@@ -0,0 +1,141 @@
+import codecs
+import threading
+from html.parser import HTMLParser
+
+# Tags that never have a closing tag, so they do not open a nesting level
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link',
+             'meta', 'param', 'source', 'track', 'wbr'}
+
+# Containers whose first <img> is the listing's gallery image
+GALLERY_TAGS = {'picture'}
+GALLERY_CLASSES = {'swipe-wrap', 'gallery'}
+
+class DetailStreamWatcher(HTMLParser):
+    """
+    Incremental HTML parser that only watches for the detail-page parts the
+    scraper reads: the <title>, the .mapAndAttrs block, #postingbody and the
+    first gallery image. feed() it chunks as they arrive; `complete` turns
+    True once every part has been seen in full, so the rest of the document
+    does not need to be downloaded.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.seen = set()
+        # Open watched elements as [part, tag, depth of same-name tags]
+        self._open = []
+        self._gallery_depth = 0
+
+    @property
+    def complete(self):
+        return {'title', 'mapAndAttrs', 'postingbody', 'image'} <= self.seen
+
+    def _part(self, tag, attrs):
+        if tag == 'title':
+            return 'title'
+        if attrs.get('id') == 'postingbody':
+            return 'postingbody'
+        if 'mapAndAttrs' in (attrs.get('class') or '').split():
+            return 'mapAndAttrs'
+        return None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'img':
+            if self._gallery_depth and (attrs.get('src') or attrs.get('data-src')):
+                self.seen.add('image')
+            return
+        if tag in VOID_TAGS:
+            return
+
+        for entry in self._open:
+            if entry[1] == tag:
+                entry[2] += 1
+        part = self._part(tag, attrs)
+        if part is not None and part not in self.seen:
+            self._open.append([part, tag, 1])
+        if tag in GALLERY_TAGS or GALLERY_CLASSES & set((attrs.get('class') or '').split()):
+            self._open.append(['gallery', tag, 1])
+            self._gallery_depth += 1
+
+    def handle_startendtag(self, tag, attrs):
+        # <img ... /> and friends never open a nesting level
+        if tag == 'img':
+            self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        still_open = []
+        for entry in self._open:
+            if entry[1] == tag:
+                entry[2] -= 1
+                if entry[2] == 0:
+                    if entry[0] == 'gallery':
+                        self._gallery_depth -= 1
+                    else:
+                        self.seen.add(entry[0])
+                    continue
+            still_open.append(entry)
+        self._open = still_open
+
+class StreamStats:
+    """Bytes read vs. skipped by early-terminated detail page downloads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.pages = 0
+        self.stopped_early = 0
+        self.bytes_read = 0
+        self.bytes_saved = 0
+
+    def record(self, bytes_read, bytes_saved, stopped_early):
+        with self._lock:
+            self.pages += 1
+            self.stopped_early += 1 if stopped_early else 0
+            self.bytes_read += bytes_read
+            self.bytes_saved += bytes_saved
+
+    def summary(self):
+        with self._lock:
+            total = self.bytes_read + self.bytes_saved
+            share = self.bytes_saved / total * 100 if total else 0.0
+            return (f"Streamed detail pages: {self.pages} pages, {self.stopped_early} stopped early, "
+                    f"{self.bytes_read / 1024:.0f} KB read, {self.bytes_saved / 1024:.0f} KB skipped ({share:.0f}%)")
+
+def read_detail_prefix(response, chunk_size=8192, stats=None):
+    """
+    Read a streamed (stream=True) detail page response only until the needed
+    elements have been seen, then close the connection.
+
+    Returns (html, stopped_early, bytes_read, bytes_saved). Byte counts are
+    as sent over the wire; bytes_saved is 0 when the server did not send a
+    Content-Length. A truncated html is only good for parsing, never for
+    caching or archiving.
+    """
+    watcher = DetailStreamWatcher()
+    decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')(errors='replace')
+    parts = []
+    stopped_early = False
+    try:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            text = decoder.decode(chunk)
+            parts.append(text)
+            watcher.feed(text)
+            if watcher.complete:
+                stopped_early = True
+                break
+        if not stopped_early:
+            parts.append(decoder.decode(b'', final=True))
+        # Bytes pulled over the wire, before decompression
+        bytes_read = response.raw.tell()
+    finally:
+        # Closing mid-body drops the connection instead of reading the rest
+        response.close()
+
+    try:
+        bytes_total = int(response.headers.get('Content-Length', ''))
+    except ValueError:
+        bytes_total = bytes_read
+    bytes_saved = max(bytes_total - bytes_read, 0) if stopped_early else 0
+    if stats is not None:
+        stats.record(bytes_read, bytes_saved, stopped_early)
+    return ''.join(parts), stopped_early, bytes_read, bytes_saved
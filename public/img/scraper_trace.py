@@ -0,0 +1,131 @@
+import sys
+import math
+import json
+import time
+import threading
+from contextlib import contextmanager
+from collections import defaultdict
+
+# Stages in the order they are reported
+STAGES = ['delay', 'browser_start', 'page_load', 'page_wait', 'connect', 'ttfb', 'body',
+          'parse', 'selector', 'image_write', 'output_write', 'listing']
+
+class Tracer:
+    """
+    Writes timing spans for each crawl stage to a JSONL trace file.
+
+    Every line is one span: run ID, stage, start time, duration in ms, the
+    listing being processed on that thread (if any) and extra fields such as
+    bytes or host. Lines are buffered and flushed every flush_every spans.
+    """
+
+    def __init__(self, path='crawl_trace.jsonl', enabled=True, flush_every=200):
+        self.path = path
+        self.enabled = enabled
+        self.flush_every = flush_every
+        self.run_id = time.strftime('%Y%m%dT%H%M%S')
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._buffer = []
+
+    @contextmanager
+    def listing(self, listing_id):
+        """Tag every span recorded on this thread with a listing ID"""
+        previous = getattr(self._local, 'listing', None)
+        self._local.listing = listing_id
+        try:
+            yield
+        finally:
+            self._local.listing = previous
+
+    @contextmanager
+    def span(self, stage, **fields):
+        """
+        Time the enclosed block as one span. The yielded dict can be filled
+        with extra fields (e.g. bytes) before the block ends.
+        """
+        start = time.time()
+        began = time.perf_counter()
+        try:
+            yield fields
+        finally:
+            self.record(stage, time.perf_counter() - began, start=start, **fields)
+
+    def record(self, stage, seconds, start=None, **fields):
+        """Record a span whose duration was measured elsewhere"""
+        if not self.enabled:
+            return
+        entry = {'run': self.run_id, 'stage': stage,
+                 'start': round(start if start is not None else time.time() - seconds, 6),
+                 'ms': round(seconds * 1000, 3)}
+        listing_id = getattr(self._local, 'listing', None)
+        if listing_id is not None and 'listing' not in fields:
+            entry['listing'] = listing_id
+        entry.update(fields)
+        with self._lock:
+            self._buffer.append(json.dumps(entry))
+            if len(self._buffer) >= self.flush_every:
+                self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write("\n".join(self._buffer) + "\n")
+        self._buffer = []
+
+    def close(self):
+        with self._lock:
+            self._flush()
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+def load_spans(path, run=None):
+    """Read spans from a trace file, only the given run (default: the latest run)"""
+    spans = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                spans.append(json.loads(line))
+            except ValueError:
+                continue
+    if spans:
+        run = run or spans[-1]['run']
+        spans = [span for span in spans if span['run'] == run]
+    return spans
+
+def trace_report(path, run=None):
+    """Per-stage p50/p95/p99 and total time, plus bytes transferred per listing"""
+    spans = load_spans(path, run)
+    if not spans:
+        return f"No spans found in {path}"
+
+    durations = defaultdict(list)
+    listing_bytes = defaultdict(int)
+    for span in spans:
+        durations[span['stage']].append(span['ms'])
+        if span.get('listing') is not None and span['stage'] in ('body', 'image_write'):
+            listing_bytes[span['listing']] += span.get('bytes', 0)
+
+    stages = [s for s in STAGES if s in durations] + sorted(set(durations) - set(STAGES))
+    lines = [f"Trace {spans[0]['run']}: {len(spans)} spans",
+             f"{'stage':<14}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'total s':>10}"]
+    for stage in stages:
+        values = sorted(durations[stage])
+        lines.append(f"{stage:<14}{len(values):>7}{percentile(values, 50):>10.1f}"
+                     f"{percentile(values, 95):>10.1f}{percentile(values, 99):>10.1f}"
+                     f"{sum(values) / 1000:>10.1f}")
+
+    if listing_bytes:
+        values = sorted(listing_bytes.values())
+        lines.append(f"Bytes per listing ({len(values)} listings): p50 {percentile(values, 50) / 1024:.1f} KB, "
+                     f"p95 {percentile(values, 95) / 1024:.1f} KB, total {sum(values) / 1024 / 1024:.1f} MB")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    print(trace_report(sys.argv[1] if len(sys.argv) > 1 else 'crawl_trace.jsonl'))
@@ -0,0 +1,218 @@
+import time
+import threading
+import requests
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from scraper_engine import HostLimiter
+from scraper_ratelimit import BACKOFF_STATUSES
+
+class ConnectionStats:
+    """Thread-safe counters for requests, new connections and handshake time"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+        self.connect_seconds = 0.0
+        self.per_host = {}
+
+    def _host(self, host):
+        if host not in self.per_host:
+            self.per_host[host] = {'requests': 0, 'new_connections': 0}
+        return self.per_host[host]
+
+    def record_request(self, host):
+        with self._lock:
+            self.requests += 1
+            self._host(host)['requests'] += 1
+
+    def record_new_connection(self, host):
+        with self._lock:
+            self.new_connections += 1
+            self._host(host)['new_connections'] += 1
+
+    def record_connect_time(self, seconds):
+        with self._lock:
+            self.connect_seconds += seconds
+
+    @property
+    def reused_connections(self):
+        return max(self.requests - self.new_connections, 0)
+
+    def summary(self):
+        """Return a printable summary of connection reuse"""
+        with self._lock:
+            avg_connect = self.connect_seconds / self.new_connections if self.new_connections else 0.0
+            reused = self.reused_connections
+            lines = [
+                f"Requests: {self.requests}, new connections: {self.new_connections}, reused: {reused}",
+                f"Average connect+handshake: {avg_connect*1000:.1f} ms, "
+                f"estimated time saved by reuse: {reused * avg_connect:.1f} s",
+            ]
+            for host, counts in sorted(self.per_host.items()):
+                host_reused = max(counts['requests'] - counts['new_connections'], 0)
+                lines.append(f"  {host}: {counts['requests']} requests, "
+                             f"{counts['new_connections']} new, {host_reused} reused")
+            return "\n".join(lines)
+
+def _counting_pool_class(base_pool, base_conn, stats, tracer=None):
+    """Build a connection pool class that reports new connections and connect time"""
+
+    class TimedConnection(base_conn):
+        def connect(self):
+            start = time.perf_counter()
+            try:
+                return super().connect()
+            finally:
+                # Includes DNS lookup, TCP connect and the TLS handshake
+                elapsed = time.perf_counter() - start
+                stats.record_connect_time(elapsed)
+                if tracer is not None:
+                    tracer.record('connect', elapsed, host=self.host)
+
+    class CountingPool(base_pool):
+        ConnectionCls = TimedConnection
+
+        def _new_conn(self):
+            stats.record_new_connection(self.host)
+            return super()._new_conn()
+
+    return CountingPool
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter whose connection pools count new vs. reused connections"""
+
+    def __init__(self, stats, tracer=None, **kwargs):
+        self.stats = stats
+        self.tracer = tracer
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _counting_pool_class(HTTPConnectionPool, HTTPConnection, self.stats, self.tracer),
+            'https': _counting_pool_class(HTTPSConnectionPool, HTTPSConnection, self.stats, self.tracer),
+        }
+
+    def send(self, request, **kwargs):
+        self.stats.record_request(urlparse(request.url).hostname)
+        return super().send(request, **kwargs)
+
+class Transport:
+    """
+    One long-lived HTTP transport shared by every listing-page and image
+    request, so keep-alive connections and TLS sessions are reused across
+    the whole crawl.
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=4, pool_block=True, per_host=4,
+                 cache=None, cache_only=False, archive=None, replay=False, tracer=None,
+                 rate_limiter=None, max_retries=3):
+        self.stats = ConnectionStats()
+        # Optional HostRateLimiter: paces every network request per host and
+        # retries 429/503 answers up to max_retries times after backing off
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        # Optional Tracer that gets connect, TTFB and body download spans
+        self.tracer = tracer
+        # Optional ResponseCache used for requests made with use_cache=True
+        self.cache = cache
+        self.cache_only = cache_only
+        # Optional ResponseArchive: page responses are appended to it, or
+        # served from it with no network at all when replay is on
+        self.archive = archive
+        self.replay = replay
+        self.host_limiter = HostLimiter(per_host)
+        self.session = requests.Session()
+        # pool_connections: how many hosts keep a pool, pool_maxsize: connections per host
+        adapter = PooledAdapter(self.stats, tracer=tracer, pool_connections=pool_connections,
+                                pool_maxsize=pool_maxsize, pool_block=pool_block)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def get(self, url, headers=None, timeout=30, use_cache=False, archive=False, **kwargs):
+        """GET a URL while holding one of its host's request slots"""
+        if self.replay:
+            return self._replay_get(url)
+        if self.cache is not None and (use_cache or self.cache_only):
+            response = self._cached_get(url, headers, timeout, **kwargs)
+        else:
+            response = self._send(url, headers, timeout, **kwargs)
+        # Only fresh network bodies go into the archive, not cache replays
+        if archive and self.archive is not None and response.status_code == 200 \
+                and not getattr(response, 'from_cache', False):
+            self.archive.write_response(url, response)
+        return response
+
+    def _send(self, url, headers, timeout, **kwargs):
+        """Network GET holding one of the host's request slots, rate limited and traced if set up"""
+        host = urlparse(url).hostname
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                # Wait for the host's next slot outside the connection slot
+                delay = self.rate_limiter.wait(url)
+                if delay > 0 and self.tracer is not None:
+                    self.tracer.record('delay', delay, host=host)
+
+            with self.host_limiter.slot(url):
+                start = time.perf_counter()
+                response = self.session.get(url, headers=headers, timeout=timeout, **kwargs)
+                total = time.perf_counter() - start
+            if self.tracer is not None:
+                # elapsed runs from sending the request until the headers are parsed
+                ttfb = response.elapsed.total_seconds()
+                self.tracer.record('ttfb', ttfb, host=host, status=response.status_code)
+                if not kwargs.get('stream'):
+                    # Without stream=True the body has already been read at this point
+                    self.tracer.record('body', max(total - ttfb, 0.0), host=host, bytes=len(response.content))
+
+            if self.rate_limiter is None:
+                return response
+            self.rate_limiter.feedback(url, response)
+            if response.status_code not in BACKOFF_STATUSES or attempt >= self.max_retries:
+                return response
+            attempt += 1
+            response.close()
+            print(f"Retrying {url} after {response.status_code} (retry {attempt}/{self.max_retries})")
+
+    def _replay_get(self, url):
+        """Serve a URL from the archive, never from the network"""
+        record = self.archive.get(url) if self.archive is not None else None
+        if record is not None:
+            return record.to_response()
+        response = requests.models.Response()
+        response.status_code = 504
+        response.url = url
+        response._content = b''
+        response._content_consumed = True
+        return response
+
+    def _cached_get(self, url, headers, timeout, **kwargs):
+        """GET through the response cache, revalidating stored entries"""
+        entry = self.cache.lookup(url)
+        if self.cache_only:
+            # Offline mode: never touch the network
+            if entry:
+                self.cache.record('hits')
+                return self.cache.to_response(entry)
+            self.cache.record('misses')
+            return self.cache.offline_miss(url)
+
+        request_headers = dict(headers or {})
+        if entry:
+            request_headers.update(self.cache.conditional_headers(entry))
+        response = self._send(url, request_headers, timeout, **kwargs)
+
+        if response.status_code == 304 and entry:
+            self.cache.record('revalidated')
+            return self.cache.to_response(entry)
+        self.cache.record('misses')
+        if response.status_code == 200:
+            self.cache.store(url, response)
+        return response
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,106 @@
+import time
+import threading
+from scraper_selectors import FINGERPRINT_MARKERS, fingerprint_from_markers
+
+# Installs a MutationObserver once per document, then reports in one round trip
+# the match count of every selector, the page height, how long the DOM has
+# been quiet and the layout fingerprint inputs.
+PAGE_PROBE_JS = """
+var selectors = arguments[0], markers = arguments[1];
+if (!window.__scraperProbe) {
+    var state = {last: performance.now()};
+    try {
+        new MutationObserver(function () { state.last = performance.now(); })
+            .observe(document.documentElement, {childList: true, subtree: true});
+    } catch (e) {}
+    window.__scraperProbe = state;
+}
+return {
+    counts: selectors.map(function (s) {
+        try { return document.querySelectorAll(s).length; } catch (e) { return 0; }
+    }),
+    height: document.body ? document.body.scrollHeight : 0,
+    quiet_ms: performance.now() - window.__scraperProbe.last,
+    ready: document.readyState,
+    body_class: document.body ? document.body.className : '',
+    markers: markers.map(function (m) { return document.querySelector(m) !== null; })
+};
+"""
+
+class WaitStats:
+    """Time spent in page waits compared with the old fixed-sleep schedule"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.waits = 0
+        self.waited_seconds = 0.0
+        self.fixed_seconds = 0.0
+
+    def record(self, fixed_seconds, waited_seconds):
+        with self._lock:
+            self.waits += 1
+            self.fixed_seconds += fixed_seconds
+            self.waited_seconds += waited_seconds
+
+    def summary(self):
+        return (f"Page waits: {self.waits} waits took {self.waited_seconds:.1f}s "
+                f"vs {self.fixed_seconds:.1f}s of fixed sleeps "
+                f"(saved {self.fixed_seconds - self.waited_seconds:.1f}s)")
+
+class PageSettler:
+    """
+    Wait for a Selenium page to stop changing instead of sleeping a fixed time.
+
+    settle() polls PAGE_PROBE_JS and returns once the selector counts and page
+    height have not changed, and the DOM has seen no mutations, for
+    idle_seconds. The old fixed sleep is used as the upper bound, so a wait is
+    never longer than it used to be. With event_driven=False it just sleeps
+    the fixed time, for comparison runs.
+    """
+
+    def __init__(self, selectors, kind='search', idle_seconds=1.0, poll_seconds=0.2,
+                 event_driven=True, stats=None, tracer=None):
+        self.selectors = selectors
+        self.kind = kind
+        self.idle_seconds = idle_seconds
+        self.poll_seconds = poll_seconds
+        self.event_driven = event_driven
+        self.stats = stats if stats is not None else WaitStats()
+        self.tracer = tracer
+
+    def probe(self, driver):
+        """Run the probe once; adds 'fingerprint' to the returned dict"""
+        result = driver.execute_script(PAGE_PROBE_JS, self.selectors, FINGERPRINT_MARKERS[self.kind])
+        result['fingerprint'] = fingerprint_from_markers(self.kind, result['body_class'], result['markers'])
+        return result
+
+    def settle(self, driver, fixed_seconds):
+        """Wait until the page is idle (at most fixed_seconds) and return the last probe"""
+        start = time.monotonic()
+        if not self.event_driven:
+            time.sleep(fixed_seconds)
+            self._record(fixed_seconds, time.monotonic() - start)
+            return self.probe(driver)
+
+        deadline = start + fixed_seconds
+        last_signature = None
+        stable_since = start
+        while True:
+            result = self.probe(driver)
+            now = time.monotonic()
+            signature = (tuple(result['counts']), result['height'])
+            if signature != last_signature:
+                last_signature = signature
+                stable_since = now
+            quiet = min(now - stable_since, result['quiet_ms'] / 1000)
+            if (result['ready'] == 'complete' and quiet >= self.idle_seconds) or now >= deadline:
+                break
+            time.sleep(self.poll_seconds)
+
+        self._record(fixed_seconds, time.monotonic() - start)
+        return result
+
+    def _record(self, fixed_seconds, waited_seconds):
+        self.stats.record(fixed_seconds, waited_seconds)
+        if self.tracer is not None:
+            self.tracer.record('page_wait', waited_seconds, fixed_ms=fixed_seconds * 1000)
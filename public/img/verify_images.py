@@ -0,0 +1,198 @@
+import io
+import os
+import csv
+import json
+import shutil
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+
+IMAGE_DIR = 'car_images'
+CACHE_FILE = 'image_verify_cache.json'   # Results keyed by SHA-256, so unchanged files are skipped
+REPORT_FILE = 'bad_images.csv'
+
+STRIP_METADATA = True    # Drop EXIF/XMP/IPTC/comments (lossless, image data untouched)
+QUARANTINE_DIR = None    # e.g. 'car_images_bad' to move corrupt and non-image files out of car_images/
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif')
+
+# Run this before build_image_store.py: stripping changes a file's content hash
+
+# PNG chunks that only carry metadata
+PNG_METADATA_CHUNKS = {b'tEXt', b'zTXt', b'iTXt', b'eXIf', b'tIME'}
+
+def file_sha256(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def looks_like_text(data):
+    """True for HTML error pages and other text saved under an image name"""
+    head = data[:512].lstrip().lower()
+    return head.startswith((b'<!doctype', b'<html', b'<?xml', b'<head', b'<body', b'{')) or \
+        (bool(head) and all(byte in b'\t\n\r' or 32 <= byte < 127 for byte in head))
+
+def strip_jpeg_metadata(data):
+    """
+    Remove APP1-APP15 (except ICC profiles and Adobe APP14) and comment
+    segments from a JPEG without touching the compressed image data.
+    Returns the data unchanged if the marker structure looks wrong.
+    """
+    if data[:2] != b'\xff\xd8':
+        return data
+    out = [data[:2]]
+    i = 2
+    while i + 4 <= len(data):
+        if data[i] != 0xFF:
+            return data
+        marker = data[i + 1]
+        if marker == 0xFF:
+            # Fill byte before a marker
+            i += 1
+            continue
+        if marker == 0xDA:
+            # Start of scan: everything from here on is image data
+            out.append(data[i:])
+            return b''.join(out)
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            out.append(data[i:i + 2])
+            i += 2
+            continue
+        length = int.from_bytes(data[i + 2:i + 4], 'big')
+        segment = data[i:i + 2 + length]
+        is_icc = marker == 0xE2 and segment[4:16] == b'ICC_PROFILE\x00'
+        metadata = marker == 0xFE or (0xE1 <= marker <= 0xEF and marker != 0xEE and not is_icc)
+        if not metadata:
+            out.append(segment)
+        i += 2 + length
+    return data
+
+def strip_png_metadata(data):
+    """Remove text, EXIF and timestamp chunks from a PNG"""
+    if data[:8] != b'\x89PNG\r\n\x1a\n':
+        return data
+    out = [data[:8]]
+    i = 8
+    while i + 8 <= len(data):
+        length = int.from_bytes(data[i:i + 4], 'big')
+        chunk_type = data[i + 4:i + 8]
+        end = i + 12 + length
+        if chunk_type not in PNG_METADATA_CHUNKS:
+            out.append(data[i:end])
+        i = end
+        if chunk_type == b'IEND':
+            break
+    return b''.join(out)
+
+def check_image(path):
+    """
+    Decode one image completely and, if it is fine, strip its metadata in
+    place. Returns a result dict: status (ok, corrupt or not_image), format,
+    width, height, bytes before and after, the final sha256 and any error.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    result = {'status': 'ok', 'format': None, 'width': None, 'height': None,
+              'bytes': len(data), 'stripped_bytes': len(data), 'sha256': None, 'error': ''}
+
+    if not data or looks_like_text(data):
+        result.update(status='not_image', error='empty file' if not data else 'text/HTML content')
+        return result
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.verify()
+        # verify() only checks structure; a full decode catches truncated files
+        with Image.open(io.BytesIO(data)) as image:
+            image.load()
+            result.update(format=image.format, width=image.width, height=image.height)
+            orientation = image.getexif().get(0x0112, 1)
+    except Exception as e:
+        result.update(status='corrupt', error=str(e))
+        return result
+
+    if STRIP_METADATA and orientation == 1:
+        # EXIF orientation other than 1 is kept: dropping it would rotate the photo
+        if result['format'] == 'JPEG':
+            stripped = strip_jpeg_metadata(data)
+        elif result['format'] == 'PNG':
+            stripped = strip_png_metadata(data)
+        else:
+            stripped = data
+        if len(stripped) < len(data):
+            stat = os.stat(path)
+            tmp_path = f"{path}.strip.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(stripped)
+            os.utime(tmp_path, (stat.st_atime, stat.st_mtime))
+            os.replace(tmp_path, path)
+            data = stripped
+    result['stripped_bytes'] = len(data)
+    result['sha256'] = hashlib.sha256(data).hexdigest()
+    return result
+
+def _check_file(filename):
+    try:
+        return filename, check_image(os.path.join(IMAGE_DIR, filename))
+    except OSError as e:
+        return filename, {'status': 'corrupt', 'error': str(e), 'bytes': 0, 'stripped_bytes': 0, 'sha256': None}
+
+def verify_images():
+    """Check every image not already verified (by content hash) and report the bad ones"""
+    cache = {}
+    if os.path.exists(CACHE_FILE):
+        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+
+    results = {}
+    todo = []
+    for entry in os.scandir(IMAGE_DIR):
+        if entry.name.startswith('.') or not entry.is_file() or \
+                not entry.name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        digest = file_sha256(entry.path)
+        if digest in cache:
+            results[entry.name] = cache[digest]
+        else:
+            todo.append((entry.name, digest))
+
+    print(f"{len(results)} images already verified, {len(todo)} to check")
+    saved = 0
+    if todo:
+        digests = dict(todo)
+        with ProcessPoolExecutor() as executor:
+            for filename, result in executor.map(_check_file, [name for name, _ in todo], chunksize=16):
+                results[filename] = result
+                saved += result['bytes'] - result['stripped_bytes']
+                cached = {key: result.get(key) for key in ('status', 'format', 'width', 'height', 'error')}
+                cache[digests[filename]] = cached
+                if result.get('sha256'):
+                    # The stripped file is known-good too, so the next run skips it
+                    cache[result['sha256']] = cached
+
+    tmp_path = f"{CACHE_FILE}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, CACHE_FILE)
+
+    bad = sorted((name, result) for name, result in results.items() if result['status'] != 'ok')
+    with open(REPORT_FILE, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['ImageFileName', 'Status', 'Error'])
+        for name, result in bad:
+            writer.writerow([name, result['status'], result.get('error', '')])
+
+    if QUARANTINE_DIR and bad:
+        os.makedirs(QUARANTINE_DIR, exist_ok=True)
+        for name, _ in bad:
+            shutil.move(os.path.join(IMAGE_DIR, name), os.path.join(QUARANTINE_DIR, name))
+        print(f"Moved {len(bad)} bad files to {QUARANTINE_DIR}")
+
+    print(f"{len(results) - len(bad)} images OK, {len(bad)} corrupt or not images (see {REPORT_FILE})")
+    if saved:
+        print(f"Stripped metadata: {saved / 1024:.0f} KB saved")
+    return results
+
+if __name__ == "__main__":
+    verify_images()
@@ -14,6 +14,13 @@ status_pattern = r'Status:\s*([^;]+)'
 transmission_pattern = r'transmission:\s*([^;]+)'
 type_pattern = r'type:\s*([^;]+)'
 
+def extract_field(typed, car_attrs, field, pattern):
+    """Return the typed column value for a field, or fall back to a regex over carAttrs"""
+    if field in typed:
+        return typed[field]
+    match = re.search(pattern, car_attrs, re.IGNORECASE)
+    return match.group(1).strip() if match else ""
+
 print("Processing car_listings_new.csv to extract structured data from carAttrs column...")
 
 with open(input_file, 'r', newline='', encoding='utf-8') as infile, \
@@ -25,6 +32,18 @@ with open(input_file, 'r', newline='', encoding='utf-8') as infile, \
     # Read the header row
     header = next(reader)
     
+    # Scrapes that already carry the attributes as typed columns (reformat_csv.py
+    # appends them after imageName) are read directly; the regexes below only
+    # fill what those columns leave empty
+    typed_columns = {
+        'condition': 'Condition', 'cylinders': 'Cylinders', 'fuel': 'Fuel',
+        'odometer': 'Odometer', 'color': 'PaintColor', 'status': 'TitleStatus',
+        'transmission': 'Transmission', 'type': 'BodyType',
+    }
+    header_index = {name.strip().lower(): index for index, name in enumerate(header)}
+    typed_index = {field: header_index[column.lower()] for field, column in typed_columns.items()
+                   if column.lower() in header_index}
+    
     # Create a new header with the specified order
     # id, year, make, model, price, title, condition, cylinders, fuel, odometer, color, status, transmission, type, bodyText, imageName
     new_header = ["id", "year", "make", "model", "price", "title", 
@@ -46,29 +65,23 @@ with open(input_file, 'r', newline='', encoding='utf-8') as infile, \
             body_text = row[7] if len(row) > 7 else ""
             image_name = row[8] if len(row) > 8 else ""
             
-            # Extract fields from carAttrs using regex
-            condition_match = re.search(condition_pattern, car_attrs, re.IGNORECASE)
-            cylinders_match = re.search(cylinders_pattern, car_attrs, re.IGNORECASE)
-            fuel_match = re.search(fuel_pattern, car_attrs, re.IGNORECASE)
-            odometer_match = re.search(odometer_pattern, car_attrs, re.IGNORECASE)
-            color_match = re.search(color_pattern, car_attrs, re.IGNORECASE)
-            status_match = re.search(status_pattern, car_attrs, re.IGNORECASE)
-            transmission_match = re.search(transmission_pattern, car_attrs, re.IGNORECASE)
-            type_match = re.search(type_pattern, car_attrs, re.IGNORECASE)
+            # Prefer the typed column values where the row has them
+            typed = {field: row[index].strip() for field, index in typed_index.items()
+                     if index < len(row) and row[index].strip()}
             
-            # Get the extracted values or empty string if not found
-            condition = condition_match.group(1).strip() if condition_match else ""
-            cylinders = cylinders_match.group(1).strip() if cylinders_match else ""
-            fuel = fuel_match.group(1).strip() if fuel_match else ""
-            odometer = odometer_match.group(1).strip() if odometer_match else ""
+            # Extract the remaining fields from carAttrs using regex
+            condition = extract_field(typed, car_attrs, 'condition', condition_pattern)
+            cylinders = extract_field(typed, car_attrs, 'cylinders', cylinders_pattern)
+            fuel = extract_field(typed, car_attrs, 'fuel', fuel_pattern)
+            odometer = extract_field(typed, car_attrs, 'odometer', odometer_pattern)
             
             # Clean up color value - remove "Title" if it appears at the end
-            color = color_match.group(1).strip() if color_match else ""
+            color = extract_field(typed, car_attrs, 'color', color_pattern)
             color = re.sub(r'\s*Title.*$', '', color)
             
-            status = status_match.group(1).strip() if status_match else ""
-            transmission = transmission_match.group(1).strip() if transmission_match else ""
-            type_value = type_match.group(1).strip() if type_match else ""
+            status = extract_field(typed, car_attrs, 'status', status_pattern)
+            transmission = extract_field(typed, car_attrs, 'transmission', transmission_pattern)
+            type_value = extract_field(typed, car_attrs, 'type', type_pattern)
             
             # Also clean up any "Title" text that might appear in the odometer value
             odometer = re.sub(r'\s*Title.*$', '', odometer)
@@ -93,17 +93,26 @@ with open(input_file, 'r', encoding='utf-8') as csvfile:
         if not all([car_info['year'], car_info['make'], car_info['model']]):
             continue
         
+        # Newer scrapes carry the attributes as typed columns; the regex
+        # passes over MapAndAttrs are only a fallback for older CSVs
+        
         # Extract mileage from MapAndAttrs if available
         mileage = None
-        mileage_match = re.search(r'odometer:\s*([\d,]+)', row['MapAndAttrs'])
-        if mileage_match:
-            mileage = int(mileage_match.group(1).replace(',', ''))
+        if row.get('Odometer', '').isdigit():
+            mileage = int(row['Odometer'])
+        else:
+            mileage_match = re.search(r'odometer:\s*([\d,]+)', row['MapAndAttrs'])
+            if mileage_match:
+                mileage = int(mileage_match.group(1).replace(',', ''))
         
         # Extract color from MapAndAttrs if available
         color = "Unknown"
-        color_match = re.search(r'paint color:\s*(\w+)', row['MapAndAttrs'])
-        if color_match:
-            color = color_match.group(1)
+        if row.get('PaintColor'):
+            color = row['PaintColor']
+        else:
+            color_match = re.search(r'paint color:\s*(\w+)', row['MapAndAttrs'])
+            if color_match:
+                color = color_match.group(1)
         
         # Set default values for fields we don't have
         doors = 4  # Default value
@@ -111,9 +120,12 @@ with open(input_file, 'r', encoding='utf-8') as csvfile:
         horsepower = 0  # Default value
         
         # Extract engine info if available
-        engine_match = re.search(r'cylinders:\s*(\d+)\s*cylinders', row['MapAndAttrs'])
-        if engine_match:
-            engine_displacement = f"{engine_match.group(1)}-cylinder"
+        if row.get('Cylinders', '').isdigit():
+            engine_displacement = f"{row['Cylinders']}-cylinder"
+        else:
+            engine_match = re.search(r'cylinders:\s*(\d+)\s*cylinders', row['MapAndAttrs'])
+            if engine_match:
+                engine_displacement = f"{engine_match.group(1)}-cylinder"
         
         # Create transformed row
         transformed_row = [